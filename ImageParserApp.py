@@ -1,83 +1,52 @@
+import time
+
+# Taken before any other import so startup timings include module loading
+_STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
-from PIL import Image, ImageTk, ImageGrab
+from PIL import Image, ImageTk
 import os
-import json
 import logging
-import pytesseract
-import webbrowser
-import re
-import cv2
-import numpy as np
-import pyautogui
-import requests
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger()
-
-# Create a file handler for logging
-file_handler = logging.FileHandler('C:\\MechPUGCommander\\image_parser.log')
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-
-# Add the handler to the logger
-logger.addHandler(file_handler)
-
-def enhance_image(image):
-    # Convert PIL Image to OpenCV format
-    cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-
-    # Convert to grayscale
-    gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-
-    # Apply slight Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-
-    # Apply adaptive thresholding
-    thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-
-    # Invert the image (black text on white background)
-    inverted = cv2.bitwise_not(thresh)
-
-    # Apply slight dilation to make text more prominent
-    kernel = np.ones((2, 2), np.uint8)
-    dilated = cv2.dilate(inverted, kernel, iterations=1)
-
-    # Convert back to PIL Image
-    return Image.fromarray(cv2.cvtColor(dilated, cv2.COLOR_GRAY2RGB))
-
-def parse_image(image_path, preprocess):
-    image = Image.open(image_path)
-
-    if preprocess:
-        image = enhance_image(image)
-
-    # Use Tesseract with custom configuration
-    custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
-    text = pytesseract.image_to_string(image, config=custom_config)
-
-    # Post-process text
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-
-    # Clean up lines while preserving original characters
-    cleaned_lines = []
-    for line in lines:
-        # Remove any non-printable characters
-        cleaned_line = ''.join(char for char in line if char.isprintable())
-        # Remove leading/trailing whitespace
-        cleaned_line = cleaned_line.strip()
-        if cleaned_line:
-            cleaned_lines.append(cleaned_line)
-
-    return image, cleaned_lines
-
-def write_names_to_file(names, flag, settings):
-    file_name = os.path.join(settings['file_path'], 'team.txt' if flag == 'Team' else 'enemy.txt')
-    with open(file_name, 'w') as f:
-        for name in names:
-            f.write(name + '\n')
+import queue
+import threading
+import lazy_modules
+from ocr_engine import LOW_CONFIDENCE, recognize_line, recognize_panel
+from ocr_profiles import DEFAULT_PROFILE, load_profile
+from log_setup import configure_logging, log_stage
+from preview import PreviewRenderer
+from crop_selector import CropSelector
+from roster_output import write_roster
+from capture_source import LiveCapture, RecordingCapture, SessionRecorder
+from capture_pipeline import CapturePipeline
+from hotkeys import HotkeyManager
+from deskew import deskew
+from settings_store import get_store
+from assets import LOGO_NAME, ImageMemoryView, app_dir, load_logo, resource_path, track
+from roster_channel import RosterPublisher, DEFAULT_PORT
+
+# Log records are handed to a background listener, so file I/O never runs on the UI or OCR path
+configure_logging(filename='image_parser.log')
+
+def parse_image(image_path, preprocess, threshold=LOW_CONFIDENCE, profile=DEFAULT_PROFILE, normalize=False):
+    image = track(Image.open(image_path), 'capture')
+    if normalize:
+        # Imported photos and scaled stream grabs are straightened before any enhancement or OCR
+        with log_stage('deskew'):
+            image = deskew(image)
+    enhanced_image, lines = recognize_panel(image, preprocess, threshold, profile)
+    return enhanced_image, [line.text for line in lines], [round(line.confidence, 1) for line in lines]
+
+def parse_row(row_image, preprocess, threshold=LOW_CONFIDENCE, profile=DEFAULT_PROFILE, glyphs=None, cache=None):
+    # A single scoreboard row is one line of text
+    return recognize_line(row_image, preprocess, threshold, profile, glyphs, cache)
+
+def write_names_to_file(names, flag, settings, confidences=None):
+    write_rosters({flag: names}, settings, {flag: confidences or []})
+
+def write_rosters(rosters, settings, confidences=None):
+    # Each file is replaced atomically; roster.json carries both sides for consumers that want one file
+    return write_roster(settings['file_path'], rosters, confidences, combined=settings.get('combined_output', True))
 
 def process_image(image_path, flag, settings, preprocess):
     if not os.path.exists(image_path):
@@ -86,11 +55,13 @@ def process_image(image_path, flag, settings, preprocess):
     if flag not in ['Team', 'Enemy']:
         raise ValueError("The flag must be either 'Team' or 'Enemy'.")
 
-    enhanced_image, names = parse_image(image_path, preprocess)
-    write_names_to_file(names, flag, settings)
+    threshold = settings.get('ocr_confidence_threshold', LOW_CONFIDENCE)
+    enhanced_image, names, confidences = parse_image(image_path, preprocess, threshold, load_profile(settings),
+                                                     settings.get('deskew_imports', True))
+    write_names_to_file(names, flag, settings, confidences)
     logging.info(
         f"Names parsed and written to {'team.txt' if flag == 'Team' else 'enemy.txt'} in {settings['file_path']}.")
-    return enhanced_image, names
+    return enhanced_image, names, confidences
 
 class SettingsDialog(simpledialog.Dialog):
     def __init__(self, parent, title, settings):
@@ -151,13 +122,24 @@ class ImageParserApp(tk.Tk):
         self.configure(bg='#1e1e1e')
         self.settings = self.load_settings()
         self.preprocess_var = tk.BooleanVar(value=True)
+        # Captures go through a source object so sessions can be recorded and replayed without the game
+        source = LiveCapture()
+        self.recorder = None
+        if self.settings.get('record_dir'):
+            self.recorder = SessionRecorder(self.settings['record_dir'])
+            source = RecordingCapture(source, self.recorder)
+        self.pipeline = CapturePipeline(self.settings, source)
+        self.capturing = False
+
+        # Parsed rosters are pushed to local subscribers; team.txt/enemy.txt remain the fallback
+        self.publisher = RosterPublisher(port=self.settings.get('roster_port', DEFAULT_PORT))
+        self.publisher.start()
 
         # Load and display logo
-        logo_path = self.resource_path("KalSinn_Patchyt.png")
-        if os.path.exists(logo_path):
-            self.logo = Image.open(logo_path)
-            self.logo = self.logo.resize((50, 50), Image.LANCZOS)
-            self.logo_tk = ImageTk.PhotoImage(self.logo)
+        # Only the pre-resized 50x50 copy is decoded; Tk keeps the pixels, so no PIL copy is held
+        logo = load_logo(source_path=resource_path(LOGO_NAME))
+        if logo is not None:
+            self.logo_tk = track(ImageTk.PhotoImage(logo), 'logo')
             self.logo_label = tk.Label(self, image=self.logo_tk, bg='#1e1e1e')
             self.logo_label.grid(row=0, column=0, padx=(10, 5), pady=(10, 5), sticky="w")
 
@@ -192,6 +174,9 @@ class ImageParserApp(tk.Tk):
         self.select_enemy_button = tk.Button(self.buttons_frame, text="Select Enemy Area", command=self.select_enemy_area, bg='#3c3f41', fg='#a0a0a0')
         self.select_enemy_button.pack(side=tk.LEFT, padx=(5, 5))
 
+        self.select_both_button = tk.Button(self.buttons_frame, text="Select Both Areas", command=self.select_both_areas, bg='#3c3f41', fg='#a0a0a0')
+        self.select_both_button.pack(side=tk.LEFT, padx=(5, 5))
+
         self.preprocess_check = tk.Checkbutton(self, text="Enable Pre-processing", variable=self.preprocess_var,
                                                bg='#1e1e1e', fg='#a0a0a0')
         self.preprocess_check.grid(row=2, column=0, columnspan=3, pady=(5, 10))
@@ -240,29 +225,32 @@ class ImageParserApp(tk.Tk):
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
 
+        self.preview = PreviewRenderer(self.scrollable_frame)
+
         self.check_tesseract_installation()
 
         # Update the mouse position
         self.bind('<Motion>', self.update_mouse_position)
+        self.bind('<Control-Shift-M>', lambda event: ImageMemoryView(self))
+
+        # Global capture hotkey, delivered on the Tk thread like a button press
+        self.hotkeys = HotkeyManager(self, self.settings['parser_hotkeys'])
+        self.hotkeys.register('capture', self.capture_from_hotkey)
+        self.hotkeys.start()
 
         # Adjust the window size to fit all elements
         self.update_idletasks()
         self.minsize(self.winfo_width(), self.winfo_height())
         self.geometry(f"{self.winfo_width()}x{self.winfo_height()}")
 
-    def resource_path(self, relative_path):
-        """ Get absolute path to resource, works for dev and for PyInstaller """
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-
-        return os.path.join(base_path, relative_path)
+        self.after_idle(self.report_startup)
+        self.after(1000, self.watch_settings)
 
     def update_mouse_position(self, event):
         self.mouse_pos_label.config(text=f"Mouse Position: ({event.x}, {event.y})")
 
     def open_website(self, event):
+        import webbrowser
         webbrowser.open_new("http://ImageParserApp.freeap.io")
 
     def open_settings(self):
@@ -274,15 +262,22 @@ class ImageParserApp(tk.Tk):
             self.check_tesseract_installation()
 
     def load_settings(self):
-        try:
-            with open(self.resource_path('settings.json'), 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {'tesseract_path': 'C:\\Program Files\\Tesseract-OCR', 'file_path': 'C:\\MechPUGCommander', 'team_coords': [0, 0, 0, 0], 'enemy_coords': [0, 0, 0, 0]}
+        # Validated once; the store's in-memory dict is the app's settings from here on
+        # Writable settings live next to the app; a one-file build's bundle directory is deleted on exit
+        self.settings_store = get_store(os.path.join(app_dir(), 'settings.json'))
+        return self.settings_store.data
 
     def save_settings(self):
-        with open(self.resource_path('settings.json'), 'w') as f:
-            json.dump(self.settings, f)
+        # Debounced, and only the keys changed here are written, so PUGCommander's settings survive
+        self.settings_store.save()
+
+    def watch_settings(self):
+        changed = self.settings_store.poll()
+        if changed:
+            logging.info(f"Settings changed on disk: {', '.join(sorted(changed))}")
+            if 'tesseract_path' in changed:
+                self.check_tesseract_installation()
+        self.after(1000, self.watch_settings)
 
     def get_tesseract_path(self):
         return self.settings.get('tesseract_path', 'C:\\Program Files\\Tesseract-OCR')
@@ -290,6 +285,7 @@ class ImageParserApp(tk.Tk):
     def set_tesseract_path(self, path):
         self.settings['tesseract_path'] = path
         self.save_settings()
+        pytesseract = lazy_modules.load('pytesseract')
         pytesseract.pytesseract.tesseract_cmd = os.path.join(path, 'tesseract.exe')
 
     def browse_image(self):
@@ -309,134 +305,146 @@ class ImageParserApp(tk.Tk):
             messagebox.showerror("Error", "Please select a flag (Team or Enemy).")
             return
         try:
-            enhanced_image, names = process_image(image_path, flag, self.settings, preprocess)
-            self.display_results(enhanced_image, names)
+            enhanced_image, names, confidences = process_image(image_path, flag, self.settings, preprocess)
+            self.publisher.publish({flag: names}, {flag: confidences})
+            self.display_results([(enhanced_image, names)])
+            # The preview is made; don't hold the full-size image while the dialog is open
+            del enhanced_image
             messagebox.showinfo("Success",
                                 f"Names parsed and written to {'team.txt' if flag == 'Team' else 'enemy.txt'}.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    def display_results(self, enhanced_image, names):
-        # Clear previous results
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        # Resize image to fit the frame
-        width, height = enhanced_image.size
-        new_width = 300
-        new_height = int(height * (new_width / width))
-        resized_image = enhanced_image.resize((new_width, new_height), Image.LANCZOS)
-
-        # Convert the image for tkinter
-        tk_image = ImageTk.PhotoImage(resized_image)
-
-        # Create and place the image label
-        image_label = tk.Label(self.scrollable_frame, image=tk_image, bg='#1e1e1e')
-        image_label.image = tk_image  # Keep a reference to prevent garbage collection
-        image_label.grid(row=0, column=0, padx=(10, 5), pady=10, sticky="nw")
-
-        # Create and place the names label
-        names_text = "\n".join(names)
-        names_label = tk.Label(self.scrollable_frame, text=names_text, bg='#1e1e1e', fg='#a0a0a0', justify=tk.LEFT)
-        names_label.grid(row=0, column=1, padx=(5, 10), pady=10, sticky="nw")
+    def display_results(self, panels):
+        # panels is a list of (image, names); widgets and photos are reused between calls
+        if not self.preview.show(panels):
+            return
 
         # Adjust the window size to fit all elements
         self.update_idletasks()
         self.minsize(self.winfo_width(), self.winfo_height())
         self.geometry(f"{self.winfo_width()}x{self.winfo_height()}")
 
-    def capture_and_process_screen(self):
-        # Capture the entire screen
-        screenshot = ImageGrab.grab()
-
-        # Process the screenshot to find and extract the relevant sections
-        team_image, enemy_image = self.extract_sections(screenshot)
+    def capture_and_process_screen(self, via='button'):
+        # The pipeline keeps per-row state between frames, so one capture runs at a time
+        if self.capturing:
+            logging.info("Capture already in progress; ignoring trigger.")
+            return
+        if self.recorder is not None:
+            self.recorder.record_trigger(via, 'capture')
+        self.capturing = True
 
-        # Save the extracted images
-        team_image.save(os.path.join(self.settings['file_path'], 'team.png'))
-        enemy_image.save(os.path.join(self.settings['file_path'], 'opponent.png'))
+        # Grabbing and row OCR run off the UI thread; the first capture OCRs every row
+        results = queue.Queue()
+        thread = threading.Thread(target=self.run_capture, args=(self.preprocess_var.get(), results), daemon=True)
+        thread.start()
+        self.after(50, self.finish_capture, results, via)
 
-        # Display the results
-        self.display_results(team_image, ["Team image saved"])
-        self.display_results(enemy_image, ["Enemy image saved"])
-        messagebox.showinfo("Success", "Screen captured and processed. Team and opponent images saved.")
+    def run_capture(self, preprocess, results):
+        try:
+            team_image, enemy_image, rosters, confidences = self.pipeline.capture(preprocess)
+            write_rosters(rosters, self.settings, confidences)
+            self.publisher.publish(rosters, confidences)
+            self.pipeline.save_caches()
+        except Exception as e:
+            logging.error(f"Screen capture failed: {e}")
+            results.put((None, e))
+            return
+        results.put(([(team_image, rosters['Team']), (enemy_image, rosters['Enemy'])], None))
 
-    def extract_sections(self, screenshot):
-        # Define the regions for team and enemy sections
-        team_box = tuple(self.settings['team_coords'])
-        enemy_box = tuple(self.settings['enemy_coords'])
+    def finish_capture(self, results, via):
+        try:
+            panels, error = results.get_nowait()
+        except queue.Empty:
+            self.after(50, self.finish_capture, results, via)
+            return
+        self.capturing = False
+        if error is not None:
+            if via == 'button':
+                messagebox.showerror("Error", str(error))
+            return
 
-        # Extract the sections
-        team_image = screenshot.crop(team_box)
-        enemy_image = screenshot.crop(enemy_box)
+        # Display the results
+        self.display_results(panels)
+        # The preview is made; don't hold both captures while the dialog is open
+        del panels
+        # A hotkey fires while the game has focus, so only button presses get a dialog
+        if via == 'button':
+            messagebox.showinfo("Success", "Screen captured and processed. Names written to team.txt and enemy.txt.")
 
-        return team_image, enemy_image
+    def capture_from_hotkey(self):
+        self.capture_and_process_screen(via='hotkey')
 
-    def select_crop_area(self):
+    def select_crop_area(self, labels):
         self.withdraw()  # Hide the main window
-        screenshot = ImageGrab.grab()
-        screen = tk.Toplevel(self)
-        screen.attributes('-fullscreen', True)
-        screen.attributes('-topmost', True)
-
-        canvas = tk.Canvas(screen, cursor="cross")
-        canvas.pack(fill=tk.BOTH, expand=True)
-
-        screenshot_tk = ImageTk.PhotoImage(screenshot)
-        canvas.create_image(0, 0, image=screenshot_tk, anchor="nw")
-
-        rect = None
-        start_x = start_y = end_x = end_y = 0
-
-        def on_mouse_down(event):
-            nonlocal start_x, start_y, rect
-            start_x, start_y = event.x, event.y
-            if rect:
-                canvas.delete(rect)
-            rect = canvas.create_rectangle(start_x, start_y, start_x, start_y, outline='red')
-
-        def on_mouse_move(event):
-            nonlocal rect, end_x, end_y
-            end_x, end_y = event.x, event.y
-            canvas.coords(rect, start_x, start_y, end_x, end_y)
-
-        def on_mouse_up(event):
-            nonlocal start_x, start_y, end_x, end_y
-            end_x, end_y = event.x, event.y
-            screen.destroy()
-            self.deiconify()  # Show the main window again
-            return (start_x, start_y, end_x, end_y)
-
-        canvas.bind("<ButtonPress-1>", on_mouse_down)
-        canvas.bind("<B1-Motion>", on_mouse_move)
-        canvas.bind("<ButtonRelease-1>", on_mouse_up)
-
-        screen.wait_window(screen)
-        return (start_x, start_y, end_x, end_y)
+        selector = CropSelector(self, labels, self.settings.get('selector_downscale', 1))
+        boxes = selector.run()
+        self.deiconify()  # Show the main window again
+        return boxes
 
     def select_team_area(self):
-        coords = self.select_crop_area()
-        self.settings['team_coords'] = list(coords)
-        self.save_settings()
-        messagebox.showinfo("Success", f"Team area coordinates set to {coords}")
+        boxes = self.select_crop_area(['Team'])
+        if boxes:
+            self.set_area_coords(boxes)
 
     def select_enemy_area(self):
-        coords = self.select_crop_area()
-        self.settings['enemy_coords'] = list(coords)
+        boxes = self.select_crop_area(['Enemy'])
+        if boxes:
+            self.set_area_coords(boxes)
+
+    def select_both_areas(self):
+        boxes = self.select_crop_area(['Team', 'Enemy'])
+        if boxes:
+            self.set_area_coords(boxes)
+
+    def set_area_coords(self, boxes):
+        for label, coords in boxes.items():
+            self.settings[f'{label.lower()}_coords'] = list(coords)
         self.save_settings()
-        messagebox.showinfo("Success", f"Enemy area coordinates set to {coords}")
+        summary = ", ".join(f"{label}: {coords}" for label, coords in boxes.items())
+        messagebox.showinfo("Success", f"Area coordinates set to {summary}")
 
     def check_tesseract_installation(self):
         tesseract_path = self.get_tesseract_path()
-        if tesseract_path:
-            pytesseract.pytesseract.tesseract_cmd = os.path.join(tesseract_path, 'tesseract.exe')
-            try:
-                pytesseract.get_tesseract_version()
-            except pytesseract.pytesseract.TesseractNotFoundError:
-                self.prompt_tesseract_directory()
-        else:
+        if not tesseract_path:
+            self.prompt_tesseract_directory()
+            return
+
+        # Importing pytesseract and spawning `tesseract --version` happens off the UI thread
+        results = queue.Queue()
+        thread = threading.Thread(target=self.validate_tesseract, args=(tesseract_path, results), daemon=True)
+        thread.start()
+        self.after(100, self.finish_tesseract_check, results)
+
+    def validate_tesseract(self, tesseract_path, results):
+        start = time.perf_counter()
+        pytesseract = lazy_modules.load('pytesseract')
+        pytesseract.pytesseract.tesseract_cmd = os.path.join(tesseract_path, 'tesseract.exe')
+        try:
+            pytesseract.get_tesseract_version()
+            found = True
+        except pytesseract.pytesseract.TesseractNotFoundError:
+            found = False
+        duration_ms = (time.perf_counter() - start) * 1000
+        logging.info(f"Tesseract check finished in {duration_ms:.1f} ms (found={found})",
+                     extra={'stage': 'tesseract_check', 'duration_ms': round(duration_ms, 2), 'found': found})
+        results.put(found)
+
+    def finish_tesseract_check(self, results):
+        try:
+            found = results.get_nowait()
+        except queue.Empty:
+            self.after(100, self.finish_tesseract_check, results)
+            return
+        if not found:
             self.prompt_tesseract_directory()
 
+    def report_startup(self):
+        duration_ms = (time.perf_counter() - _STARTED) * 1000
+        imports = {name: round(seconds * 1000, 2) for name, seconds in lazy_modules.import_timings.items()}
+        logging.info(f"Window ready {duration_ms:.1f} ms after launch",
+                     extra={'stage': 'startup', 'duration_ms': round(duration_ms, 2), 'imports_ms': imports})
+
     def prompt_tesseract_directory(self):
         tesseract_dir = filedialog.askdirectory(title="Select Tesseract-OCR Installation Directory")
         if tesseract_dir:
@@ -449,4 +457,11 @@ class ImageParserApp(tk.Tk):
 
 if __name__ == "__main__":
     app = ImageParserApp()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        app.hotkeys.stop()
+        app.publisher.stop()
+        if app.recorder is not None:
+            app.recorder.close()
+        app.settings_store.close()
@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # Loaded through lazy_modules.load(), which PyInstaller cannot see
+    hiddenimports=['cv2', 'numpy', 'pytesseract'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
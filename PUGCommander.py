@@ -1,32 +1,46 @@
 import tkinter as tk
 from tkinter import scrolledtext, Scale, simpledialog, messagebox, Menu, filedialog
-from PIL import Image, ImageTk, ImageEnhance, ImageFilter
-import win32api
+from PIL import ImageTk
 import win32con
 import win32gui
-import time
 import ctypes
 import os
 import json
 import webbrowser
 import requests
-from bs4 import BeautifulSoup
-import concurrent.futures
-import logging
+import queue
 import pytesseract
-import re
 import keyring
 import numpy as np
+from hotkeys import HotkeyManager
+from log_setup import configure_logging
+from roster_channel import subscribe, DEFAULT_PORT
+from ocr_engine import enhance_image_soft
+from image_loader import load_regions
+from deskew import deskew
+from match_history import MatchHistory
+from friend_list import friend_list_text
+from settings_store import get_store
+from stats_table import StatsTable, format_balance
+from match_analysis import MatchAnalyzer, format_prediction
+from assets import LOGO_NAME, ImageMemoryView, load_logo, track
+from stats_fetcher import StatsFetcher, fetch_player_stats, PRIORITY_MATCH, PRIORITY_REFRESH
 
 # Set up logging
-logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-VK_CODE = {'insert': 0x2D, 'ctrl': 0x11, 'alt': 0x12}
+configure_logging(os.path.abspath('.'), filename='app.log')
 
 HWND_TOPMOST = -1
 SWP_NOMOVE = 0x0002
 SWP_NOSIZE = 0x0001
 
+# How often the Tk thread picks up rosters pushed by ImageParserApp
+ROSTER_POLL_MS = 250
+# How often the Tk thread picks up stats fetched in the background
+STATS_POLL_MS = 100
+
+# Sort menu label -> stats table column
+SORT_COLUMNS = {"Rank": 'rank', "K/D": 'kd', "W/L": 'wl', "Avg Score": 'score', "Games": 'games', "Kills": 'kills'}
+
 # Define the regions for OCR (adjust these values based on your screen resolution)
 TEAM_REGIONS = {
     "Your Team": (50, 150, 400, 450),
@@ -122,11 +136,11 @@ class OverlayWindow:
 
         # Load and display logo
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        logo_path = os.path.join(script_dir, "KalSinn_Patchyt.png")
-        if os.path.exists(logo_path):
-            self.logo = Image.open(logo_path)
-            self.logo = self.logo.resize((50, 50), Image.LANCZOS)
-            self.logo_tk = ImageTk.PhotoImage(self.logo)
+        logo_path = os.path.join(script_dir, LOGO_NAME)
+        # The overlay runs for hours; keep only the small Tk photo, built from the cached 50x50 logo
+        logo = load_logo(source_path=logo_path)
+        if logo is not None:
+            self.logo_tk = track(ImageTk.PhotoImage(logo), 'logo')
             self.logo_label = tk.Label(self.header_frame, image=self.logo_tk, bg='#1e1e1e')
             self.logo_label.pack(side=tk.LEFT, padx=(5, 10))
 
@@ -180,6 +194,32 @@ class OverlayWindow:
                                               bg='#3c3f41', fg='#a0a0a0', highlightthickness=0)
         self.refresh_stats_button.pack(side=tk.LEFT, padx=5)
 
+        # Match result buttons feed the win rate shown next to teammates
+        self.result_frame = tk.Frame(self.frame, bg='#1e1e1e')
+        self.result_frame.pack(fill=tk.X, pady=(0, 5))
+
+        self.won_button = tk.Button(self.result_frame, text="Won", command=lambda: self.record_result(True),
+                                    bg='#3c3f41', fg='#a0a0a0', highlightthickness=0)
+        self.won_button.pack(side=tk.LEFT, padx=5)
+
+        self.lost_button = tk.Button(self.result_frame, text="Lost", command=lambda: self.record_result(False),
+                                     bg='#3c3f41', fg='#a0a0a0', highlightthickness=0)
+        self.lost_button.pack(side=tk.LEFT, padx=5)
+
+        # Sort column and match balance, both computed from the columnar stats table
+        self.sort_frame = tk.Frame(self.frame, bg='#1e1e1e')
+        self.sort_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+        tk.Label(self.sort_frame, text="Sort by:", bg='#1e1e1e', fg='#a0a0a0').pack(side=tk.LEFT)
+        self.sort_var = tk.StringVar(value="Rank")
+        self.sort_menu = tk.OptionMenu(self.sort_frame, self.sort_var, *SORT_COLUMNS,
+                                       command=lambda _: self.populate_friend_list())
+        self.sort_menu.configure(bg='#3c3f41', fg='#a0a0a0', highlightthickness=0)
+        self.sort_menu.pack(side=tk.LEFT, padx=5)
+
+        self.balance_label = tk.Label(self.frame, bg='#1e1e1e', fg='#a0a0a0', justify=tk.LEFT,
+                                      font=("Courier", 9))
+        self.balance_label.pack(fill=tk.X, padx=10)
+
         # Search bar
         self.search_var = tk.StringVar()
         self.search_var.trace("w", self.update_friend_list)
@@ -192,8 +232,14 @@ class OverlayWindow:
         self.scroll_text.bind("<Button-3>", self.show_context_menu)
 
         self.match_players = {"Your Team": [], "Your Enemy": []}
+        self.stats_table = StatsTable()
+        self.analyzer = MatchAnalyzer(self.stats_table)
+        self.history = MatchHistory('match_history.db')
+        self.current_match_id = None
         self.username = ""
         self.tesseract_path = ""
+        self.hotkey_bindings = {}
+        self.roster_port = DEFAULT_PORT
         self.load_settings()
         self.load_friends()
         self.populate_friend_list()
@@ -202,10 +248,31 @@ class OverlayWindow:
         self.root.withdraw()
 
         self.root.after_idle(self.set_overlay_transparency)
-        self.root.after(100, self.check_hotkey)
+
+        # Global hotkeys arrive as Tk events instead of being polled
+        self.hotkeys = HotkeyManager(self.root, self.hotkey_bindings)
+        self.hotkeys.register('toggle', self.toggle_window)
+        self.hotkeys.start()
+        self.root.after(1000, self.watch_settings)
+
+        # Rosters parsed by ImageParserApp are pushed here as soon as they are written. The reader thread only
+        # queues them: Tk cannot take events from other threads until mainloop runs, and login comes first.
+        self.pending_rosters = queue.SimpleQueue()
+        self.roster_subscription = subscribe(self.pending_rosters.put, port=self.roster_port)
+        self.root.after(ROSTER_POLL_MS, self.poll_pushed_rosters)
 
         self.session = None
 
+        # Stats are fetched on a background pool and applied on the Tk thread
+        self.fetched_stats = queue.SimpleQueue()
+        # Refresh Stats has its own indicator, so an image import during a refresh cannot replace it
+        self.refresh_window = None
+        self.redraw_pending = None
+        # Fetcher threads only queue results; the Tk thread drains them like pushed rosters
+        self.fetcher = StatsFetcher(self.fetch_friend_stats, lambda name, stats: self.fetched_stats.put((name, stats)))
+        self.root.after(STATS_POLL_MS, self.poll_fetched_stats)
+        self.root.bind('<Control-Shift-M>', lambda event: ImageMemoryView(self.root))
+
         # Check for Tesseract-OCR installation
         self.check_tesseract_installation()
 
@@ -268,17 +335,38 @@ class OverlayWindow:
         return False
 
     def load_settings(self):
-        try:
-            with open('settings.json', 'r') as f:
-                settings = json.load(f)
-                self.username = settings.get('username', '')
-                self.tesseract_path = settings.get('tesseract_path', '')
-        except FileNotFoundError:
-            pass
+        # settings.json is shared with ImageParserApp; the store keeps both apps' keys intact
+        self.settings_store = get_store('settings.json')
+        settings = self.settings_store.data
+        self.username = settings['username']
+        self.tesseract_path = settings['tesseract_path']
+        self.hotkey_bindings = settings['hotkeys']
+        self.roster_port = settings['roster_port']
+        # Can point at leaderboard_standin.py to exercise refreshes without the live site
+        self.leaderboard_url = settings['leaderboard_url']
 
     def save_settings(self):
-        with open('settings.json', 'w') as f:
-            json.dump({'username': self.username, 'tesseract_path': self.tesseract_path}, f)
+        self.settings_store.data.update(username=self.username, tesseract_path=self.tesseract_path,
+                                        hotkeys=self.hotkey_bindings)
+        self.settings_store.save()
+
+    def watch_settings(self):
+        try:
+            changed = self.settings_store.poll()
+            settings = self.settings_store.data
+            if 'username' in changed:
+                self.username = settings['username']
+            if 'leaderboard_url' in changed:
+                self.leaderboard_url = settings['leaderboard_url']
+            if 'tesseract_path' in changed:
+                self.tesseract_path = settings['tesseract_path']
+                self.check_tesseract_installation()
+            if 'hotkeys' in changed:
+                self.hotkey_bindings = settings['hotkeys']
+                self.hotkeys.rebind(self.hotkey_bindings)
+        finally:
+            # Keep watching even if applying one change failed
+            self.root.after(1000, self.watch_settings)
 
     def open_settings(self):
         dialog = SettingsDialog(self.root, "User Settings", self.username, self.tesseract_path)
@@ -348,36 +436,29 @@ class OverlayWindow:
         self.populate_friend_list()
 
     def populate_friend_list(self):
-        search_query = self.search_var.get().lower()
+        # Parsed stats live in NumPy columns; only new or changed stats strings are parsed here
+        self.stats_table.sync(self.friends)
+        team, enemy = self.match_players["Your Team"], self.match_players["Your Enemy"]
+        threats = self.show_prediction().threats
+        text = friend_list_text(self.friends, self.stats_table, self.match_players, SORT_COLUMNS[self.sort_var.get()],
+                                self.username, self.search_var.get().lower(),
+                                self.history.player_summaries(team + enemy), threats)
+
         self.scroll_text.config(state=tk.NORMAL)
         self.scroll_text.delete('1.0', tk.END)
-
-        # Display user's stats if available
-        if self.username and self.username in self.friends:
-            user_stats = self.friends[self.username]
-            self.scroll_text.insert(tk.END, f"Your Stats:\n{self.username}\n{user_stats}\n\n")
-
-        # Display match players
-        for team, players in self.match_players.items():
-            self.scroll_text.insert(tk.END, f"{team}:\n")
-            for player in sorted(players, key=lambda x: self.get_rank(self.friends.get(x, ""))):
-                if search_query in player.lower() or search_query in self.friends.get(player, "").lower():
-                    stats = self.friends.get(player, "")
-                    self.scroll_text.insert(tk.END, f"{player}\n{stats}\n\n")
-            self.scroll_text.insert(tk.END, "\n")
-
-        # Display other friends
-        self.scroll_text.insert(tk.END, "Other Friends:\n")
-        for friend, stats in sorted(self.friends.items(), key=lambda x: self.get_rank(x[1])):
-            if friend not in self.match_players["Your Team"] and friend not in self.match_players["Your Enemy"]:
-                if search_query in friend.lower() or search_query in stats.lower():
-                    self.scroll_text.insert(tk.END, f"{friend}\n{stats}\n\n")
-
+        self.scroll_text.insert(tk.END, text)
         self.scroll_text.config(state=tk.DISABLED)
 
-    def get_rank(self, stats):
-        match = re.search(r'Rank: (\d+)', stats)
-        return int(match.group(1)) if match else float('inf')
+    def show_prediction(self):
+        # Vector math over the two rosters only, so it is cheap enough to rerun on every fetched result
+        team, enemy = self.match_players["Your Team"], self.match_players["Your Enemy"]
+        analysis = self.analyzer.set_rosters(team, enemy)
+        if team or enemy:
+            self.balance_label.configure(text=f"{format_prediction(analysis)}\n"
+                                              f"{format_balance(self.stats_table.balance(team, enemy))}")
+        else:
+            self.balance_label.configure(text="")
+        return analysis
 
     def toggle_window(self):
         if self.window_visible:
@@ -393,69 +474,61 @@ class OverlayWindow:
                 messagebox.showerror("Login Failed", "Unable to log in to MechWarrior Online")
                 return
 
-        self.show_loading_message("Updating friend stats...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_friend = {executor.submit(self.fetch_friend_stats, friend): friend for friend in self.friends}
-            for future in concurrent.futures.as_completed(future_to_friend):
-                friend = future_to_friend[future]
-                try:
-                    stats = future.result()
-                    if stats:
-                        self.friends[friend] = stats
-                    else:
-                        self.friends[friend] = "NOT FOUND"
-                except Exception as exc:
-                    print(f'{friend} generated an exception: {exc}')
-                    self.friends[friend] = "ERROR"
-
-        self.save_friends()
+        # Fetches run in the background; results land in the list as they arrive
+        if self.fetcher.request(list(self.friends), PRIORITY_REFRESH) and self.refresh_window is None:
+            self.refresh_window = self.show_loading_message("Updating friend stats...")
+
+    def prefetch_match_stats(self):
+        # Freshly parsed players jump ahead of any refresh still in progress
+        if self.session:
+            self.fetcher.request(self.match_players["Your Team"] + self.match_players["Your Enemy"], PRIORITY_MATCH)
+
+    def poll_fetched_stats(self):
+        try:
+            if not self.fetched_stats.empty():
+                self.apply_fetched_stats()
+        finally:
+            self.root.after(STATS_POLL_MS, self.poll_fetched_stats)
+
+    def apply_fetched_stats(self):
+        fetched = []
+        while not self.fetched_stats.empty():
+            name, stats = self.fetched_stats.get()
+            self.friends[name] = stats
+            self.stats_table.update(name, stats)
+            fetched.append(name)
+        # The prediction updates as soon as a match player's stats land; the list redraw can wait
+        if self.analyzer.involves(fetched):
+            self.show_prediction()
+        if self.fetcher.pending() == 0:
+            self.save_friends()
+            if self.refresh_window is not None:
+                self.hide_loading_message(self.refresh_window)
+                self.refresh_window = None
+        # Redraws are coalesced so a burst of results costs one repaint
+        if self.redraw_pending is None:
+            self.redraw_pending = self.root.after(200, self.redraw_friend_list)
+
+    def redraw_friend_list(self):
+        self.redraw_pending = None
         self.populate_friend_list()
-        self.hide_loading_message()
 
     def show_loading_message(self, message):
-        self.loading_window = tk.Toplevel(self.root)
-        self.loading_window.attributes("-topmost", True)
-        self.loading_window.overrideredirect(True)
-        self.loading_window.geometry(f"+{self.root.winfo_x() + 50}+{self.root.winfo_y() + 50}")
-        tk.Label(self.loading_window, text=message, padx=20, pady=10).pack()
+        loading_window = tk.Toplevel(self.root)
+        loading_window.attributes("-topmost", True)
+        loading_window.overrideredirect(True)
+        loading_window.geometry(f"+{self.root.winfo_x() + 50}+{self.root.winfo_y() + 50}")
+        tk.Label(loading_window, text=message, padx=20, pady=10).pack()
+        return loading_window
 
-    def hide_loading_message(self):
-        if hasattr(self, 'loading_window'):
-            self.loading_window.destroy()
+    def hide_loading_message(self, loading_window):
+        if loading_window.winfo_exists():
+            loading_window.destroy()
 
     def fetch_friend_stats(self, friend_name):
         if not self.session:
             return "ERROR: Not logged in"
-
-        url = f"https://mwomercs.com/profile/leaderboards/quickplay?type=0&user={friend_name}"
-        logging.info(f"Fetching stats for {friend_name} from URL: {url}")
-        try:
-            response = self.session.get(url)
-            logging.info(f"Response from URL: {response.text[:200]}...")
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            table = soup.find('table', class_='table table-striped')
-            if table:
-                rows = table.find_all('tr')
-                for row in rows[1:]:  # Skip header row
-                    columns = row.find_all('td')
-                    if columns and columns[1].text.strip() == friend_name:
-                        rank = columns[0].text.strip()
-                        total_wins = columns[2].text.strip()
-                        total_losses = columns[3].text.strip()
-                        wl_ratio = columns[4].text.strip()
-                        total_kills = columns[5].text.strip()
-                        total_deaths = columns[6].text.strip()
-                        kd_ratio = columns[7].text.strip()
-                        games_played = columns[8].text.strip()
-                        avg_match_score = columns[9].text.strip()
-                        return (f"Rank: {rank}, W: {total_wins}, L: {total_losses}, W/L: {wl_ratio}, "
-                                f"K: {total_kills}, D: {total_deaths}, K/D: {kd_ratio}, "
-                                f"Games: {games_played}, Avg Score: {avg_match_score}")
-            return "NOT FOUND"
-        except requests.RequestException as e:
-            logging.error(f"Error fetching stats for {friend_name}: {e}")
-            return "ERROR"
+        return fetch_player_stats(self.session, friend_name, self.leaderboard_url)
 
     def set_overlay_transparency(self):
         self.update_transparency()
@@ -464,14 +537,6 @@ class OverlayWindow:
         alpha = self.transparency_slider.get()
         self.root.attributes('-alpha', alpha / 255)
 
-    def check_hotkey(self):
-        if (win32api.GetAsyncKeyState(VK_CODE['ctrl']) & 0x8000 and
-                win32api.GetAsyncKeyState(VK_CODE['alt']) & 0x8000 and
-                win32api.GetAsyncKeyState(VK_CODE['insert']) & 0x8000):
-            self.toggle_window()
-            time.sleep(0.3)
-        self.root.after(100, self.check_hotkey)
-
     def force_top(self):
         hwnd = self.root.winfo_id()
         win32gui.SetWindowPos(hwnd, HWND_TOPMOST, 0, 0, 0, 0, SWP_NOMOVE | SWP_NOSIZE)
@@ -505,44 +570,68 @@ class OverlayWindow:
             self.parse_image(file_path)
 
     def parse_image(self, image_path):
-        image = Image.open(image_path)
-        self.show_loading_message("Processing image...")
-
-        for team, region in TEAM_REGIONS.items():
-            cropped_image = image.crop(region)
-            enhanced_image = self.enhance_image(cropped_image)
-            text = pytesseract.image_to_string(enhanced_image, config='--psm 6')  # Set PSM to 6
-            players = [line.strip() for line in text.split('\n') if line.strip()]  # Keep each line as a name
-            self.match_players[team] = players
-
-        self.update_match_players()
-        self.hide_loading_message()
+        loading_window = self.show_loading_message("Processing image...")
+        try:
+            # Only the two scoreboard panels are decoded and colour-converted
+            regions = load_regions(image_path, TEAM_REGIONS)
+            for team, cropped_image in regions.items():
+                # Imports may be phone photos; rotation is the only fix that survives the fixed region crop
+                enhanced_image = self.enhance_image(deskew(cropped_image, perspective=False))
+                text = pytesseract.image_to_string(enhanced_image, config='--psm 6')  # Set PSM to 6
+                players = [line.strip() for line in text.split('\n') if line.strip()]  # Keep each line as a name
+                self.match_players[team] = players
+
+            self.update_match_players()
+        finally:
+            # An unreadable file or a Tesseract error must not leave the topmost window behind
+            self.hide_loading_message(loading_window)
 
     def enhance_image(self, image):
-        # Convert to grayscale
-        gray_image = image.convert('L')
-
-        # Increase contrast
-        enhancer = ImageEnhance.Contrast(gray_image)
-        enhanced_image = enhancer.enhance(2.0)
-
-        # Increase sharpness
-        enhancer = ImageEnhance.Sharpness(enhanced_image)
-        enhanced_image = enhancer.enhance(2.0)
-
-        # Apply median filter to reduce noise
-        enhanced_image = enhanced_image.filter(ImageFilter.MedianFilter(size=3))
-
-        return enhanced_image
-
-    def update_match_players(self):
+        return enhance_image_soft(image)
+
+    def update_match_players(self, fresh_sides=None, roster_stamp=None):
+        # Only sides parsed just now go into the history; a side carried over from the last match would merge them
+        parsed = {team: players for team, players in self.match_players.items()
+                  if fresh_sides is None or team in fresh_sides}
+        self.current_match_id = (self.history.record_match(parsed, roster_stamp, roster_stamp)
+                                 or self.current_match_id)
         for team, players in self.match_players.items():
             for player in players:
                 if player not in self.friends:
                     self.friends[player] = ""
         self.populate_friend_list()
+        self.prefetch_match_stats()
+
+    def poll_pushed_rosters(self):
+        try:
+            self.apply_pushed_rosters()
+        finally:
+            self.root.after(ROSTER_POLL_MS, self.poll_pushed_rosters)
+
+    def apply_pushed_rosters(self):
+        # Every roster is applied in order: a team-only parse followed by an enemy-only one must both be recorded
+        while not self.pending_rosters.empty():
+            roster = self.pending_rosters.get()
+            stamp = roster.get('timestamp')
+            updated = roster.get('updated')
+            fresh_sides = None
+            if updated:
+                fresh_sides = {team for team, side in (("Your Team", 'team'), ("Your Enemy", 'enemy'))
+                               if updated.get(side) == stamp}
+            self.match_players = {"Your Team": roster.get('team', []), "Your Enemy": roster.get('enemy', [])}
+            self.update_match_players(fresh_sides, stamp)
+
+    def record_result(self, won):
+        if self.current_match_id is None:
+            messagebox.showinfo("Match Result", "No parsed match to record a result for.")
+            return
+        if not self.history.set_result(self.current_match_id, won):
+            messagebox.showinfo("Match Result", "A result was already recorded for this match.")
+            return
+        self.populate_friend_list()
 
     def clear_teams(self):
+        self.current_match_id = None
         self.match_players = {"Your Team": [], "Your Enemy": []}
         self.populate_friend_list()
 
@@ -554,5 +643,10 @@ if __name__ == "__main__":
     try:
         app.root.mainloop()
     finally:
+        app.hotkeys.stop()
+        app.roster_subscription.close()
+        app.fetcher.stop()
+        app.history.close()
+        app.settings_store.close()
         if app.session:
             app.session.close()
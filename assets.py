@@ -0,0 +1,112 @@
+import logging
+import os
+import sys
+import threading
+import weakref
+
+from PIL import Image
+
+LOGO_NAME = "KalSinn_Patchyt.png"
+LOGO_SIZE = (50, 50)
+# Bytes per pixel as Pillow stores each mode; RGB is padded to four bytes
+_MODE_BYTES = {'1': 1, 'L': 1, 'P': 1, 'LA': 4, 'RGB': 4, 'RGBA': 4, 'RGBX': 4, 'I': 4, 'F': 4}
+
+
+def app_dir():
+    # Next to the executable when frozen (the bundle directory is temporary), next to the sources otherwise
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def resource_path(relative_path):
+    """ Get absolute path to resource, works for dev and for PyInstaller """
+    return os.path.join(getattr(sys, '_MEIPASS', app_dir()), relative_path)
+
+
+def image_bytes(image):
+    # Works for PIL images and Tk photos alike
+    if isinstance(image, Image.Image):
+        width, height = image.size
+        return width * height * _MODE_BYTES.get(image.mode, 4)
+    return image.width() * image.height() * 4
+
+
+class ImageTracker:
+    # Weak registry of live images by kind; entries disappear when the image is garbage collected
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live = {}  # id -> (kind, bytes)
+
+    def track(self, image, kind):
+        key = id(image)
+        with self._lock:
+            self._live[key] = (kind, image_bytes(image))
+        weakref.finalize(image, self._forget, key)
+        return image
+
+    def _forget(self, key):
+        with self._lock:
+            self._live.pop(key, None)
+
+    def summary(self):
+        """ {kind: (count, bytes)} for images still alive """
+        totals = {}
+        with self._lock:
+            for kind, size in self._live.values():
+                count, total = totals.get(kind, (0, 0))
+                totals[kind] = (count + 1, total + size)
+        return totals
+
+
+tracker = ImageTracker()
+
+
+def track(image, kind):
+    return tracker.track(image, kind)
+
+
+def load_logo(size=LOGO_SIZE, source_path=None, cache_dir=None):
+    """ The logo at `size`, resized once and cached as a small PNG next to the app """
+    source_path = source_path or resource_path(LOGO_NAME)
+    cache_path = os.path.join(cache_dir or app_dir(), f"{os.path.splitext(LOGO_NAME)[0]}_{size[0]}x{size[1]}.png")
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(source_path):
+            with Image.open(cache_path) as cached:
+                return track(cached.convert('RGBA'), 'logo')
+    except OSError:
+        pass  # No cache yet, or the source is missing and handled below
+
+    if not os.path.exists(source_path):
+        return None
+    with Image.open(source_path) as source:
+        logo = source.convert('RGBA').resize(size, Image.LANCZOS)
+    try:
+        logo.save(cache_path)
+    except OSError as e:
+        # A read-only install still works, it just resizes on every launch
+        logging.warning(f"Could not cache resized logo at {cache_path}: {e}")
+    return track(logo, 'logo')
+
+
+class ImageMemoryView:
+    # Small debug window listing live images by kind, refreshed once a second
+    def __init__(self, parent, interval_ms=1000):
+        import tkinter as tk
+        self.interval_ms = interval_ms
+        self.window = tk.Toplevel(parent)
+        self.window.title("Image Memory")
+        self.window.configure(bg='#1e1e1e')
+        self.label = tk.Label(self.window, bg='#1e1e1e', fg='#a0a0a0', justify=tk.LEFT, font=("Courier", 10))
+        self.label.pack(padx=10, pady=10)
+        self.refresh()
+
+    def refresh(self):
+        if not self.window.winfo_exists():
+            return
+        summary = tracker.summary()
+        lines = [f"{kind:<10} {count:>4}  {size / 1024:>9.1f} KB" for kind, (count, size) in sorted(summary.items())]
+        total = sum(size for _, size in summary.values())
+        lines.append(f"{'total':<10} {sum(count for count, _ in summary.values()):>4}  {total / 1024:>9.1f} KB")
+        self.label.configure(text="\n".join(lines))
+        self.window.after(self.interval_ms, self.refresh)
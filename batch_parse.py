@@ -0,0 +1,191 @@
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+import lazy_modules
+from image_loader import load_regions
+from ocr_engine import LOW_CONFIDENCE, recognize_panel
+from ocr_profiles import load_profile
+from settings_store import read_settings
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Per-process state set up once by init_worker
+_worker = {}
+
+
+def find_images(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def tesseract_command(settings):
+    tesseract_path = settings.get('tesseract_path')
+    if not tesseract_path:
+        return None
+    return os.path.join(tesseract_path, 'tesseract.exe' if os.name == 'nt' else 'tesseract')
+
+
+def decode_to_shared(path, boxes, scale=1.0):
+    # Decode only the regions, once, in the parent; workers receive the block name and a region descriptor
+    regions = {key: np.asarray(image) for key, image in load_regions(path, boxes, scale).items()}
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(region.nbytes for region in regions.values())))
+    descriptors = {}
+    offset = 0
+    for key, region in regions.items():
+        np.ndarray(region.shape, dtype=np.uint8, buffer=block.buf, offset=offset)[:] = region
+        descriptors[key] = (offset, region.shape)
+        offset += region.nbytes
+    return block, descriptors
+
+
+def init_worker(settings):
+    command = tesseract_command(settings)
+    if command:
+        pytesseract = lazy_modules.load('pytesseract')
+        pytesseract.pytesseract.tesseract_cmd = command
+    _worker['profile'] = load_profile(settings)
+    _worker['preprocess'] = settings.get('preprocess', True)
+    _worker['threshold'] = settings.get('ocr_confidence_threshold', LOW_CONFIDENCE)
+
+
+def attach_shared(block_name):
+    # The parent owns and unlinks the block; workers share its resource tracker, so they must not unregister it
+    try:
+        return shared_memory.SharedMemory(name=block_name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track flag; re-registering with the shared tracker is harmless
+        return shared_memory.SharedMemory(name=block_name)
+
+
+def ocr_region(block_name, descriptor):
+    block = attach_shared(block_name)
+    try:
+        offset, shape = descriptor
+        region = np.ndarray(shape, dtype=np.uint8, buffer=block.buf, offset=offset)
+        # Copy the region out so no view into the block outlives close()
+        pixels = region.copy()
+        del region
+    finally:
+        block.close()
+    return ocr_array(pixels)
+
+
+def ocr_array(pixels):
+    # Runs in a worker set up by init_worker; returns (names, confidences) for one panel
+    _, lines = recognize_panel(Image.fromarray(pixels), _worker['preprocess'], _worker['threshold'],
+                               _worker['profile'])
+    return [line.text for line in lines], [round(line.confidence, 1) for line in lines]
+
+
+class BatchParser:
+    # Runs region OCR on a process pool with at most `window` decoded images in flight
+    def __init__(self, settings, workers=None, window=None, scale=1.0):
+        self.settings = settings
+        self.scale = scale
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window or self.workers * 2
+        self.regions = {'team': tuple(settings['team_coords']), 'enemy': tuple(settings['enemy_coords'])}
+
+    def run(self, paths, on_result):
+        in_flight = {}  # future -> (image index, side)
+        images = {}  # image index -> state for the decoded regions still being OCRed
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                                        initargs=(self.settings,)) as pool:
+                for index, path in enumerate(paths):
+                    # Backpressure: wait for an image to finish before decoding another
+                    while len(images) >= self.window:
+                        self._collect(in_flight, images, on_result)
+                    try:
+                        block, descriptors = decode_to_shared(path, self.regions, self.scale)
+                    except (OSError, ValueError) as e:
+                        on_result({'image': path, 'error': str(e)})
+                        continue
+                    images[index] = {'block': block, 'pending': len(descriptors), 'result': {'image': path},
+                                     'started': time.perf_counter()}
+                    for side, descriptor in descriptors.items():
+                        future = pool.submit(ocr_region, block.name, descriptor)
+                        in_flight[future] = (index, side)
+                while in_flight:
+                    self._collect(in_flight, images, on_result)
+        finally:
+            # An aborted run (Ctrl-C, broken pool) must not leave decoded images behind in shared memory
+            for state in images.values():
+                state['block'].close()
+                try:
+                    state['block'].unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _collect(self, in_flight, images, on_result):
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            index, side = in_flight.pop(future)
+            state = images[index]
+            try:
+                names, confidences = future.result()
+                state['result'][side] = names
+                state['result'].setdefault('confidences', {})[side] = confidences
+            except Exception as e:
+                state['result']['error'] = str(e)
+            state['pending'] -= 1
+            if state['pending'] == 0:
+                # Both regions are done, so the shared block can go
+                state['block'].close()
+                state['block'].unlink()
+                state['result']['seconds'] = round(time.perf_counter() - state['started'], 3)
+                del images[index]
+                on_result(state['result'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR team and enemy rosters from archived screenshots.")
+    parser.add_argument('paths', nargs='+', help="image files or directories")
+    parser.add_argument('--settings', default='settings.json')
+    parser.add_argument('--out', default='-', help="JSON lines output file (default: stdout)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--window', type=int, default=None, help="maximum decoded images in flight")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="decode JPEGs at reduced scale (e.g. 0.5) when the text is large enough")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = read_settings(args.settings)
+
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    count = 0
+    start = time.perf_counter()
+
+    def on_result(result):
+        nonlocal count
+        count += 1
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    try:
+        BatchParser(settings, args.workers, args.window, args.scale).run(find_images(args.paths), on_result)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Parsed {count} images in {elapsed:.1f} s ({count / elapsed if elapsed else 0:.2f} images/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
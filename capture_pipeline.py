@@ -0,0 +1,93 @@
+import logging
+import os
+
+from assets import track
+from consensus import capture_frames, vote_rows
+from frame_gate import FrameGate
+from log_setup import log_stage
+from ocr_engine import LOW_CONFIDENCE, recognize_line
+from ocr_profiles import load_profile
+from row_cache import RowCache
+
+
+class CapturePipeline:
+    # Grab both scoreboard panels from a capture source and OCR them; no Tk, so replays can run it headless
+    def __init__(self, settings, source):
+        self.settings = settings
+        self.source = source
+        self.frame_gate = FrameGate(settings.get('rows_per_team', 12))
+        self.glyphs = None
+        cache_path = None
+        if settings.get('row_cache_persist', True):
+            cache_path = os.path.join(settings.get('file_path', '.'), 'row_cache.json')
+        self.row_cache = RowCache(settings.get('row_cache_size', 2048), cache_path)
+
+    def grab_sections(self):
+        # Only the two panels are grabbed, never the whole screen
+        team_image = track(self.source.grab(self.settings['team_coords']), 'panel')
+        enemy_image = track(self.source.grab(self.settings['enemy_coords']), 'panel')
+        return team_image, enemy_image
+
+    def capture(self, preprocess, save_crops=True):
+        """ One capture: returns (team image, enemy image, rosters, confidences) """
+        team_image, enemy_image = self.grab_sections()
+
+        # Save the extracted images
+        if save_crops:
+            team_image.save(os.path.join(self.settings['file_path'], 'team.png'))
+            enemy_image.save(os.path.join(self.settings['file_path'], 'opponent.png'))
+
+        frame_count = self.settings.get('consensus_frames', 1)
+        if frame_count > 1:
+            # Grab a few more frames of each panel and vote per row instead of trusting one noisy capture
+            team_frames = [team_image] + capture_frames(self.settings['team_coords'], frame_count - 1,
+                                                        source=self.source)
+            enemy_frames = [enemy_image] + capture_frames(self.settings['enemy_coords'], frame_count - 1,
+                                                          source=self.source)
+            team_names, team_confidences = self.parse_section_consensus('Team', team_frames, preprocess)
+            enemy_names, enemy_confidences = self.parse_section_consensus('Enemy', enemy_frames, preprocess)
+        else:
+            # OCR only the rows that changed since the last capture
+            team_names, team_confidences = self.parse_section('Team', team_image, preprocess)
+            enemy_names, enemy_confidences = self.parse_section('Enemy', enemy_image, preprocess)
+        rosters = {'Team': team_names, 'Enemy': enemy_names}
+        confidences = {'Team': team_confidences, 'Enemy': enemy_confidences}
+        return team_image, enemy_image, rosters, confidences
+
+    def recognize_row(self, preprocess, threshold, profile):
+        glyphs = self.glyph_recognizer()
+        return lambda row: recognize_line(row, preprocess, threshold, profile, glyphs, self.row_cache)
+
+    def parse_section(self, flag, image, preprocess):
+        threshold = self.settings.get('ocr_confidence_threshold', LOW_CONFIDENCE)
+        profile = load_profile(self.settings)
+        with log_stage('ocr_section', region=flag) as fields:
+            rows, changed = self.frame_gate.process((flag, preprocess, profile.name), image,
+                                                    self.recognize_row(preprocess, threshold, profile))
+            fields.update(rows=len(rows), changed=changed)
+        lines = [row for row in rows if row.text]
+        return [line.text for line in lines], [round(line.confidence, 1) for line in lines]
+
+    def parse_section_consensus(self, flag, frames, preprocess):
+        threshold = self.settings.get('ocr_confidence_threshold', LOW_CONFIDENCE)
+        profile = load_profile(self.settings)
+        recognize = self.recognize_row(preprocess, threshold, profile)
+        with log_stage('ocr_consensus', region=flag, frames=len(frames)):
+            votes = vote_rows(frames, self.frame_gate.row_count, lambda row: recognize(row).text)
+        votes = [(text, confidence) for text, confidence in votes if text]
+        return [text for text, _ in votes], [round(confidence, 1) for _, confidence in votes]
+
+    def glyph_recognizer(self):
+        # The glyph fast path is optional; NumPy and the atlas are only loaded once it is enabled
+        if not self.settings.get('glyph_fast_path', False):
+            return None
+        if self.glyphs is None:
+            from glyph_ocr import GlyphRecognizer
+            self.glyphs = GlyphRecognizer(os.path.join(self.settings['file_path'], 'glyph_atlas.npz'))
+        return self.glyphs
+
+    def save_caches(self):
+        if self.glyphs is not None:
+            self.glyphs.save()
+        self.row_cache.save()
+        logging.info(f"Row cache: {self.row_cache.hits} hits, {self.row_cache.misses} misses this session.")
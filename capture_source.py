@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from PIL import Image
+
+SESSION_FILE = 'session.jsonl'
+
+
+class LiveCapture:
+    # Screen grabs through Pillow; bbox is (left, top, right, bottom) in screen pixels, None for the whole screen
+    def grab(self, bbox=None):
+        from PIL import ImageGrab
+        return ImageGrab.grab(bbox=tuple(bbox) if bbox else None)
+
+
+class SessionRecorder:
+    # Writes timestamped region captures and hotkey presses to a directory; PNG encoding runs on its own thread
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._start = time.perf_counter()
+        self._count = 0
+        self._lock = threading.Lock()
+        self._log = open(os.path.join(directory, SESSION_FILE), 'a', encoding='utf-8')
+        self._pending = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_frames, name='session-recorder', daemon=True)
+        self._writer.start()
+
+    def record_frame(self, bbox, image):
+        with self._lock:
+            self._count += 1
+            file_name = f'frame_{self._count:06d}.png'
+            self._append({'type': 'frame', 'bbox': list(bbox) if bbox else None, 'file': file_name})
+        # The caller may keep using the image, so the writer gets its own copy
+        self._pending.put((file_name, image.copy()))
+
+    def record_trigger(self, via, name):
+        # via is 'hotkey' or 'button'; the replay driver re-fires hotkeys through a hotkey backend
+        with self._lock:
+            self._append({'type': via, 'name': name})
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join()
+        with self._lock:
+            self._log.close()
+
+    def _append(self, event):
+        event['t'] = round(time.perf_counter() - self._start, 4)
+        self._log.write(json.dumps(event) + '\n')
+        self._log.flush()
+
+    def _write_frames(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            file_name, image = item
+            try:
+                # Fast zlib level; sessions are for replay, not archiving
+                image.save(os.path.join(self.directory, file_name), compress_level=1)
+            except OSError as e:
+                logging.error(f"Could not save recorded frame {file_name}: {e}")
+
+
+class RecordingCapture:
+    # Passes grabs through from another source and records each one
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def grab(self, bbox=None):
+        image = self.source.grab(bbox)
+        self.recorder.record_frame(bbox, image)
+        return image
+
+
+def load_session(directory):
+    with open(os.path.join(directory, SESSION_FILE), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayCapture:
+    # Serves recorded frames back in order per region; once a region runs out its last frame repeats
+    def __init__(self, directory, events=None):
+        self.directory = directory
+        self._frames = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        for event in events if events is not None else load_session(directory):
+            if event['type'] == 'frame':
+                self._frames.setdefault(self._key(event['bbox']), deque()).append(event['file'])
+
+    def grab(self, bbox=None):
+        key = self._key(bbox)
+        with self._lock:
+            frames = self._frames.get(key)
+            if frames:
+                self._last[key] = frames.popleft()
+            file_name = self._last.get(key)
+        if file_name is None:
+            raise LookupError(f"No recorded frames for region {bbox}")
+        with Image.open(os.path.join(self.directory, file_name)) as image:
+            return image.convert('RGB')
+
+    @staticmethod
+    def _key(bbox):
+        return tuple(bbox) if bbox else None
@@ -0,0 +1,62 @@
+import concurrent.futures
+import os
+import time
+from collections import Counter
+
+from frame_gate import row_bands, split_rows
+
+
+def capture_frames(bbox, count, interval=0.05, source=None):
+    # Quick successive grabs of one region; the scoreboard is static, so only noise differs between them
+    if source is None:
+        from capture_source import LiveCapture
+        source = LiveCapture()
+    frames = []
+    for index in range(count):
+        if index:
+            time.sleep(interval)
+        frames.append(source.grab(bbox))
+    return frames
+
+
+def edit_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def vote_strings(candidates):
+    """ Pick a consensus string from several readings of the same row; returns (text, confidence 0-100) """
+    readings = [candidate for candidate in candidates if candidate]
+    if not readings:
+        return '', 0.0
+
+    # The medoid is the reading closest to all others, which discards outliers like a dropped row
+    medoid = min(readings, key=lambda reading: sum(edit_distance(reading, other) for other in readings))
+
+    # Readings of the medoid's length are aligned character by character and vote per position
+    aligned = [reading for reading in readings if len(reading) == len(medoid)]
+    text = []
+    agreement = []
+    for column in zip(*aligned):
+        char, votes = Counter(column).most_common(1)[0]
+        text.append(char)
+        agreement.append(votes / len(aligned))
+
+    per_char = sum(agreement) / len(agreement) if agreement else 0.0
+    return ''.join(text), per_char * len(aligned) / len(candidates) * 100
+
+
+def vote_rows(frames, row_count, recognize_row, workers=None):
+    """ OCR every row of every frame in parallel and vote a final (text, confidence) per row position """
+    # Rows are found once and cut identically from every frame, so row positions line up for the vote
+    bands = row_bands(frames[0], row_count) if frames else []
+    rows_per_frame = [split_rows(frame, row_count, bands) for frame in frames]
+    with concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        # Tesseract runs as a subprocess, so threads are enough to keep every core busy
+        readings = [list(pool.map(recognize_row, rows)) for rows in rows_per_frame]
+    return [vote_strings([frame_readings[index] for frame_readings in readings]) for index in range(len(bands))]
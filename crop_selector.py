@@ -0,0 +1,115 @@
+import tkinter as tk
+from PIL import Image, ImageGrab, ImageTk
+
+# Brightness kept when dimming the snapshot behind the selection
+DIM_FACTOR = 0.6
+# Minimum milliseconds between rectangle redraws while dragging (~60 Hz)
+MOTION_INTERVAL_MS = 16
+OUTLINE_COLOURS = ['red', 'cyan', 'yellow', 'lime']
+
+
+def display_snapshot(screenshot, max_size, downscale=1):
+    # Shrink the grab to fit the display, then dim it so the selection stands out
+    width, height = screenshot.size
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0) / max(downscale, 1)
+    target = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+    factor = int(1 / scale)
+    snapshot = screenshot.reduce(factor) if factor >= 2 else screenshot
+    if snapshot.size != target:
+        snapshot = snapshot.resize(target, Image.BILINEAR)
+    return snapshot.point(lambda p: int(p * DIM_FACTOR))
+
+
+class CropSelector:
+    # Fullscreen drag selector for one or more labelled regions, returning boxes in screenshot pixels
+    def __init__(self, parent, labels, downscale=1):
+        self.parent = parent
+        self.labels = list(labels)
+        self.boxes = {}
+        self.cancelled = False
+
+        self.screen = tk.Toplevel(parent)
+        self.screen.attributes('-fullscreen', True)
+        self.screen.attributes('-topmost', True)
+        screen_size = (self.screen.winfo_screenwidth(), self.screen.winfo_screenheight())
+
+        # Only the reduced snapshot is kept; the full-resolution grab is dropped straight away
+        screenshot = ImageGrab.grab()
+        self.full_size = screenshot.size
+        snapshot = display_snapshot(screenshot, screen_size, downscale)
+        screenshot.close()
+        del screenshot
+
+        self.ratio = (self.full_size[0] / snapshot.width, self.full_size[1] / snapshot.height)
+        self.offset = ((screen_size[0] - snapshot.width) // 2, (screen_size[1] - snapshot.height) // 2)
+        self.snapshot_size = snapshot.size
+
+        self.canvas = tk.Canvas(self.screen, cursor="cross", bg='black', highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.snapshot_tk = ImageTk.PhotoImage(snapshot)
+        self.canvas.create_image(self.offset[0], self.offset[1], image=self.snapshot_tk, anchor="nw")
+        self.prompt = self.canvas.create_text(screen_size[0] // 2, 30, fill='white', font=("Helvetica", 16, "bold"))
+
+        self.rect = None
+        self.start = self.end = (0, 0)
+        self.redraw_pending = False
+        self.update_prompt()
+
+        self.canvas.bind("<ButtonPress-1>", self.on_mouse_down)
+        self.canvas.bind("<B1-Motion>", self.on_mouse_move)
+        self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
+        self.screen.bind("<Escape>", self.cancel)
+        self.screen.focus_force()
+
+    def current_label(self):
+        return self.labels[len(self.boxes)]
+
+    def update_prompt(self):
+        label = self.current_label()
+        self.canvas.itemconfigure(self.prompt, text=f"Drag to select the {label} area (Esc to cancel)")
+
+    def on_mouse_down(self, event):
+        self.start = self.end = (event.x, event.y)
+        colour = OUTLINE_COLOURS[len(self.boxes) % len(OUTLINE_COLOURS)]
+        self.rect = self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline=colour, width=2)
+
+    def on_mouse_move(self, event):
+        # Motion events only record the position; redraws are coalesced to the refresh interval
+        self.end = (event.x, event.y)
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.canvas.after(MOTION_INTERVAL_MS, self.redraw)
+
+    def redraw(self):
+        self.redraw_pending = False
+        if self.rect:
+            self.canvas.coords(self.rect, *self.start, *self.end)
+
+    def on_mouse_up(self, event):
+        self.end = (event.x, event.y)
+        self.redraw()
+        self.boxes[self.current_label()] = self.to_full_resolution(self.start, self.end)
+        self.rect = None
+        if len(self.boxes) == len(self.labels):
+            self.screen.destroy()
+        else:
+            self.update_prompt()
+
+    def to_full_resolution(self, start, end):
+        # Map canvas coordinates back onto the original screenshot and normalise the drag direction
+        points = []
+        for (x, y) in (start, end):
+            x = min(max(x - self.offset[0], 0), self.snapshot_size[0])
+            y = min(max(y - self.offset[1], 0), self.snapshot_size[1])
+            points.append((int(round(x * self.ratio[0])), int(round(y * self.ratio[1]))))
+        (x1, y1), (x2, y2) = points
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    def cancel(self, event=None):
+        self.cancelled = True
+        self.screen.destroy()
+
+    def run(self):
+        self.screen.wait_window(self.screen)
+        return None if self.cancelled else self.boxes
@@ -0,0 +1,142 @@
+import logging
+import math
+
+from PIL import Image
+
+import lazy_modules
+
+# Skew estimates are made on a copy no larger than this on its long side
+ANALYSIS_SIZE = 800
+# Below this many degrees Tesseract copes fine and the warp would only blur the glyphs
+MIN_SKEW = 0.5
+# Beyond this the estimate is more likely wrong (or the image is rotated 90 degrees) than skewed
+MAX_SKEW = 15.0
+# A screen outline has to cover this much of a photo before it is treated as the page
+MIN_QUAD_AREA = 0.3
+# Corners further than this fraction of the image from an axis-aligned rectangle need a perspective fix
+QUAD_TOLERANCE = 0.02
+
+
+def _analysis_image(image):
+    # Grayscale, downsampled copy plus the factor back to full resolution
+    np = lazy_modules.load('numpy')
+    gray = image.convert('L')
+    factor = max(1, math.ceil(max(gray.size) / ANALYSIS_SIZE))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray), factor
+
+
+def estimate_skew(gray):
+    """ Dominant text-line angle in degrees (positive is counter-clockwise), or None when there is no text """
+    cv2 = lazy_modules.load('cv2')
+    np = lazy_modules.load('numpy')
+
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    # Text is the minority class; make it white whichever way round the scoreboard is drawn
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    # Smear glyphs horizontally so each name becomes one long bar
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 1)))
+
+    segments = cv2.HoughLinesP(lines, 1, np.pi / 360, threshold=50, minLineLength=gray.shape[1] // 8, maxLineGap=5)
+    if segments is not None:
+        # OpenCV 4 returns (N, 1, 4) and OpenCV 5 (N, 4)
+        x1, y1, x2, y2 = segments.reshape(-1, 4).T.astype(np.float64)
+        angles = np.degrees(np.arctan2(y1 - y2, x2 - x1))
+        lengths = np.hypot(x2 - x1, y2 - y1)
+        near_horizontal = np.abs(angles) <= MAX_SKEW
+        if near_horizontal.any():
+            # Length-weighted median, so a few stray diagonal strokes can't drag the estimate
+            angles, lengths = angles[near_horizontal], lengths[near_horizontal]
+            order = np.argsort(angles)
+            cumulative = np.cumsum(lengths[order])
+            return float(angles[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+    # Too little line structure for Hough; fall back to the rectangle around all text pixels
+    points = cv2.findNonZero(lines)
+    if points is None or len(points) < 50:
+        return None
+    # Read the angle off the box's long edge; minAreaRect's own angle convention changed between OpenCV releases
+    box = cv2.boxPoints(cv2.minAreaRect(points))
+    edges = np.roll(box, -1, axis=0) - box
+    dx, dy = max(edges, key=lambda edge: math.hypot(*edge))
+    angle = math.degrees(math.atan2(-dy, dx))
+    if angle > 90:
+        angle -= 180
+    elif angle <= -90:
+        angle += 180
+    return angle if abs(angle) <= MAX_SKEW else None
+
+
+def find_screen_quad(gray):
+    """ Corners (tl, tr, br, bl) of a photographed screen in analysis pixels, or None if the image is the screen """
+    cv2 = lazy_modules.load('cv2')
+    np = lazy_modules.load('numpy')
+
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    height, width = gray.shape
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < MIN_QUAD_AREA * width * height:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) != 4:
+            continue
+        corners = approx[:, 0].astype(np.float32)
+        # Order as top-left, top-right, bottom-right, bottom-left
+        sums, diffs = corners.sum(axis=1), np.diff(corners, axis=1)[:, 0]
+        quad = np.array([corners[sums.argmin()], corners[diffs.argmin()],
+                         corners[sums.argmax()], corners[diffs.argmax()]])
+        left, top = quad.min(axis=0)
+        right, bottom = quad.max(axis=0)
+        rectangle = np.array([[left, top], [right, top], [right, bottom], [left, bottom]])
+        if np.abs(quad - rectangle).max() <= QUAD_TOLERANCE * max(width, height):
+            return None
+        return quad
+    return None
+
+
+def normalize(image, perspective=True):
+    """ Straighten a photographed or rotated screenshot with one warp; returns (image, description or None) """
+    cv2 = lazy_modules.load('cv2')
+    np = lazy_modules.load('numpy')
+
+    gray, factor = _analysis_image(image)
+
+    quad = find_screen_quad(gray) if perspective else None
+    if quad is not None:
+        quad = quad * factor
+        width = int(max(np.linalg.norm(quad[1] - quad[0]), np.linalg.norm(quad[2] - quad[3])))
+        height = int(max(np.linalg.norm(quad[3] - quad[0]), np.linalg.norm(quad[2] - quad[1])))
+        target = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+        matrix = cv2.getPerspectiveTransform(quad.astype(np.float32), target)
+        pixels = np.asarray(image.convert('RGB'))
+        warped = cv2.warpPerspective(pixels, matrix, (width, height), flags=cv2.INTER_CUBIC)
+        return Image.fromarray(warped), 'perspective'
+
+    angle = estimate_skew(gray)
+    if angle is None or abs(angle) < MIN_SKEW:
+        return image, None
+
+    # Full-resolution pixels are only converted once a warp is actually needed
+    pixels = np.asarray(image.convert('RGB'))
+    # Rotate about the centre into a canvas big enough for the rotated corners
+    height, width = pixels.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width, new_height = int(height * sin + width * cos), int(height * cos + width * sin)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    # Replicating the border keeps the fill the scoreboard's own background colour
+    rotated = cv2.warpAffine(pixels, matrix, (new_width, new_height), flags=cv2.INTER_CUBIC,
+                             borderMode=cv2.BORDER_REPLICATE)
+    return Image.fromarray(rotated), f'rotated {angle:.1f} deg'
+
+
+def deskew(image, perspective=True):
+    # Logs what was done so slow imports can be traced back to the normalization stage
+    normalized, action = normalize(image, perspective)
+    if action:
+        logging.info(f"Normalized imported image ({action}).")
+    return normalized
@@ -0,0 +1,125 @@
+import hashlib
+from PIL import Image
+
+import lazy_modules
+
+# Size each row is downsampled to before hashing
+FINGERPRINT_SIZE = (48, 6)
+# Grey levels kept after downsampling, so capture noise does not flip the hash
+FINGERPRINT_LEVELS = 16
+# Fractions of the nominal row height (panel height / row count) used when segmenting rows
+ROW_GAP_MERGE = 0.15  # gaps shorter than this join two ink runs (accents, dots, underlines)
+ROW_MIN_HEIGHT = 0.2  # shorter runs are noise or separator lines
+ROW_PADDING = 0.2  # margin kept above and below the text of the first and last row
+
+
+def even_bands(height, row_count):
+    row_height = height / row_count
+    return [(int(round(index * row_height)), int(round((index + 1) * row_height))) for index in range(row_count)]
+
+
+def row_bands(image, row_count):
+    """ (top, bottom) of each text row, found from the panel's horizontal ink projection
+
+    Headers, padding and uneven spacing no longer shift the cuts into the names. Falls back to even slices when
+    the projection does not look like a list of rows.
+    """
+    np = lazy_modules.load('numpy')
+    width, height = image.size
+    if height == 0 or row_count <= 0:
+        return []
+    nominal = height / row_count
+
+    # Ink is whichever value is in the minority, as in glyph_ocr.binarize
+    pixels = np.asarray(image.convert('L'))
+    ink = pixels < 128
+    if ink.mean() > 0.5:
+        ink = ~ink
+    inked = ink.sum(axis=1) > max(1, width // 200)
+
+    edges = np.diff(np.concatenate(([0], inked.astype(np.int8), [0])))
+    runs = [[start, end] for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+    if not runs:
+        return []
+
+    merged = [runs[0]]
+    for start, end in runs[1:]:
+        if start - merged[-1][1] < ROW_GAP_MERGE * nominal:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    runs = []
+    for start, end in merged:
+        if end - start < ROW_MIN_HEIGHT * nominal:
+            continue
+        # A run spanning several rows (touching highlight bars) is cut evenly
+        pieces = max(1, int(round((end - start) / nominal)))
+        step = (end - start) / pieces
+        runs.extend((int(round(start + i * step)), int(round(start + (i + 1) * step))) for i in range(pieces))
+
+    if not runs or len(runs) > 2 * row_count:
+        return even_bands(height, row_count)
+
+    # A fixed margin around each line, as Tesseract wants, never reaching past halfway to the next row. The
+    # crop then depends only on the row itself, so its fingerprint survives rows appearing or leaving nearby.
+    padding = int(round(ROW_PADDING * nominal))
+    middles = [0] + [(end + start) // 2 for (_, end), (start, _) in zip(runs, runs[1:])] + [height]
+    return [(max(middles[index], start - padding), min(middles[index + 1], end + padding))
+            for index, (start, end) in enumerate(runs)]
+
+
+def split_rows(image, row_count, bands=None):
+    # Cut a scoreboard panel into its player rows; pass bands to cut several frames of one panel alike
+    width, _ = image.size
+    if bands is None:
+        bands = row_bands(image, row_count)
+    return [image.crop((0, top, width, bottom)) for top, bottom in bands]
+
+
+def row_fingerprint(row_image):
+    small = row_image.resize(FINGERPRINT_SIZE, Image.BILINEAR).convert('L')
+    step = 256 // FINGERPRINT_LEVELS
+    quantized = small.point(lambda p: p // step)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+
+
+class FrameGate:
+    def __init__(self, row_count=12):
+        self.row_count = row_count
+        # region key -> {fingerprint: result} for the rows of the last frame
+        self._regions = {}
+
+    def process(self, key, image, recognize_row):
+        """ Recognize the rows of a panel, re-running OCR only on rows whose pixels changed
+
+        Rows are matched by fingerprint rather than position, so a row appearing or leaving mid-list does not
+        make every row below it count as changed.
+        """
+        previous = self._regions.get(key, {})
+        results = []
+        current = {}
+        ambiguous = set()
+        changed = 0
+        for row in split_rows(image, self.row_count):
+            fingerprint = row_fingerprint(row)
+            if fingerprint in previous:
+                result = previous[fingerprint]
+            else:
+                result = recognize_row(row)
+                changed += 1
+            if fingerprint in current:
+                ambiguous.add(fingerprint)
+            current[fingerprint] = result
+            results.append(result)
+
+        # Two rows that hash alike cannot be told apart next frame, so neither result is reused
+        for fingerprint in ambiguous:
+            del current[fingerprint]
+        self._regions[key] = current
+        return results, changed
+
+    def reset(self, key=None):
+        if key is None:
+            self._regions.clear()
+        else:
+            self._regions.pop(key, None)
@@ -0,0 +1,39 @@
+from match_history import format_summary
+
+
+def friend_list_text(friends, stats_table, match_players, sort_column, username="", search_query="",
+                     summaries=None, threats=None):
+    """ The overlay's friend list as one string; no Tk, so the stats load test can time every redraw
+
+    stats_table must already be synced with friends. summaries and threats are keyed by match player.
+    """
+    summaries = summaries or {}
+    threats = threats or {}
+    parts = []
+
+    # Display user's stats if available
+    if username and username in friends:
+        parts.append(f"Your Stats:\n{username}\n{friends[username]}\n\n")
+
+    # Display match players with their encounter history
+    for team_name, players in match_players.items():
+        parts.append(f"{team_name}:\n")
+        ordered = stats_table.order(sort_column, players)
+        ordered += [player for player in players if player not in stats_table.index]
+        for player in ordered:
+            stats = friends.get(player, "")
+            if search_query in player.lower() or search_query in stats.lower():
+                history = f"\n{format_summary(summaries[player])}" if player in summaries else ""
+                threat = f"\nThreat {threats[player]:+.2f}" if player in threats else ""
+                parts.append(f"{player}\n{stats}{threat}{history}\n\n")
+        parts.append("\n")
+
+    # Display other friends
+    parts.append("Other Friends:\n")
+    in_match = {player for players in match_players.values() for player in players}
+    for friend in stats_table.order(sort_column):
+        stats = friends[friend]
+        if friend not in in_match:
+            if search_query in friend.lower() or search_query in stats.lower():
+                parts.append(f"{friend}\n{stats}\n\n")
+    return "".join(parts)
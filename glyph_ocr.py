@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import numpy as np
+
+# Side of the square every glyph is normalised to before matching
+GLYPH_SIZE = 16
+# Normalised correlation a glyph needs against its best atlas entry to count as known
+MATCH_THRESHOLD = 0.85
+# Samples closer than this to an existing entry of the same character are not added
+DUPLICATE_THRESHOLD = 0.97
+MAX_SAMPLES_PER_CHAR = 8
+# A column gap wider than this fraction of the line height is a space
+SPACE_RATIO = 0.35
+# Tesseract confidence a row needs before its glyphs are learned
+LEARN_CONFIDENCE = 90
+
+
+def binarize(image):
+    # Ink is whichever value is in the minority, so both light-on-dark and dark-on-light rows work
+    pixels = np.asarray(image.convert('L'))
+    ink = pixels < 128
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def segment_glyphs(ink):
+    """ Split a binarized row into glyphs by column projection; returns the glyphs and space flags between them """
+    rows = np.flatnonzero(ink.any(axis=1))
+    if rows.size == 0:
+        return [], []
+    top, bottom = rows[0], rows[-1] + 1
+    line = ink[top:bottom]
+
+    edges = np.diff(np.concatenate(([0], line.any(axis=0).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Glyphs keep the full line height so '.', '-' and ',' stay distinguishable by position
+    glyphs = [line[:, start:end] for start, end in zip(starts, ends)]
+    spaces = list((starts[1:] - ends[:-1]) > SPACE_RATIO * (bottom - top))
+    return glyphs, spaces
+
+
+def normalize_glyph(glyph):
+    # Centre the glyph in a square canvas (keeping its aspect ratio) and sample it down to GLYPH_SIZE
+    height, width = glyph.shape
+    side = max(height, width)
+    canvas = np.zeros((side, side), dtype=np.float32)
+    left = (side - width) // 2
+    canvas[:height, left:left + width] = glyph
+    index = (np.arange(GLYPH_SIZE) * side) // GLYPH_SIZE
+    vector = canvas[np.ix_(index, index)].ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class GlyphRecognizer:
+    # Fast path for the scoreboard's fixed font: correlates segmented glyphs against a learned atlas
+    def __init__(self, path=None):
+        self.path = path
+        self.vectors = np.zeros((0, GLYPH_SIZE * GLYPH_SIZE), dtype=np.float32)
+        self.labels = []
+        self.dirty = False
+        # Rows may be recognized from several threads at once (multi-frame voting)
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        with np.load(path) as atlas:
+            self.vectors = atlas['vectors'].astype(np.float32)
+            self.labels = [str(label) for label in atlas['labels']]
+        logging.info(f"Loaded glyph atlas with {len(self.labels)} samples from {path}")
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path or not self.dirty:
+            return
+        temp_path = path + '.tmp.npz'
+        np.savez_compressed(temp_path, vectors=self.vectors, labels=np.array(self.labels))
+        os.replace(temp_path, path)
+        self.dirty = False
+
+    def match(self, ink):
+        glyphs, spaces = segment_glyphs(ink)
+        if not glyphs:
+            return glyphs, spaces, None, None, []
+        vectors = np.stack([normalize_glyph(glyph) for glyph in glyphs])
+        # The atlas only ever grows, so trimming to the shorter of the two keeps rows and labels paired
+        atlas, labels = self.vectors, self.labels
+        atlas = atlas[:len(labels)]
+        labels = labels[:len(atlas)]
+        if not labels:
+            return glyphs, spaces, vectors, None, labels
+        # One matrix product scores every glyph against every atlas entry
+        return glyphs, spaces, vectors, vectors @ atlas.T, labels
+
+    def recognize(self, image):
+        """ Returns (text, confidence), or None when any glyph is unknown and Tesseract must read the row """
+        _, spaces, _, scores, labels = self.match(binarize(image))
+        if scores is None:
+            return None
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        if best_scores.min() < MATCH_THRESHOLD:
+            return None
+
+        text = labels[best[0]]
+        for space, index in zip(spaces, best[1:]):
+            text += (' ' if space else '') + labels[index]
+        return text, float(best_scores.min()) * 100
+
+    def learn(self, image, text, confidence):
+        # Only confident rows whose segmentation lines up with the text one-to-one are learned
+        if confidence < LEARN_CONFIDENCE or not text:
+            return False
+        ink = binarize(image)
+        with self._lock:
+            _, spaces, vectors, scores, labels = self.match(ink)
+            characters = text.replace(' ', '')
+            if vectors is None or len(characters) != len(vectors) or sum(spaces) != text.count(' '):
+                return False
+
+            labels = np.array(labels)
+            added = []
+            new_labels = list(self.labels)
+            for index, char in enumerate(characters):
+                if scores is not None:
+                    same = labels == char
+                    if same.sum() >= MAX_SAMPLES_PER_CHAR or (same.any() and scores[index, same].max() >= DUPLICATE_THRESHOLD):
+                        continue
+                added.append(index)
+                new_labels.append(char)
+            if added:
+                # Swap in new arrays rather than mutating, so concurrent readers see a consistent atlas
+                self.vectors, self.labels = np.vstack([self.vectors, vectors[added]]), new_labels
+                self.dirty = True
+            return bool(added)
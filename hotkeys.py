@@ -0,0 +1,180 @@
+import ctypes
+import logging
+import queue
+import sys
+import threading
+
+# Virtual key codes that hotkey bindings may use
+VK_CODE = {'insert': 0x2D, 'delete': 0x2E, 'home': 0x24, 'end': 0x23, 'pageup': 0x21, 'pagedown': 0x22,
+           'space': 0x20, 'tab': 0x09, 'pause': 0x13, 'scrolllock': 0x91}
+VK_CODE.update({f'f{number}': 0x6F + number for number in range(1, 13)})
+VK_CODE.update({chr(code).lower(): code for code in range(ord('A'), ord('Z') + 1)})
+VK_CODE.update({chr(code): code for code in range(ord('0'), ord('9') + 1)})
+
+MODIFIERS = {'alt': 0x0001, 'ctrl': 0x0002, 'shift': 0x0004, 'win': 0x0008}
+MOD_NOREPEAT = 0x4000
+WM_HOTKEY = 0x0312
+WM_QUIT = 0x0012
+
+DEFAULT_BINDINGS = {'toggle': 'ctrl+alt+insert', 'capture': 'ctrl+alt+home'}
+
+
+def valid_bindings(bindings):
+    # Invalid bindings are logged and left out, so one bad entry cannot take the other hotkeys down with it
+    valid = {}
+    for name, binding in bindings.items():
+        try:
+            parse_binding(binding)
+        except (AttributeError, ValueError) as e:
+            logging.error(f"Ignoring hotkey for {name}: {e}")
+            continue
+        valid[name] = binding
+    return valid
+
+
+def parse_binding(binding):
+    # "ctrl+alt+insert" -> (modifier flags, virtual key code)
+    modifiers = 0
+    key = None
+    for part in binding.lower().split('+'):
+        part = part.strip()
+        if part in MODIFIERS:
+            modifiers |= MODIFIERS[part]
+        elif key is None and part in VK_CODE:
+            key = VK_CODE[part]
+        else:
+            raise ValueError(f"Invalid hotkey binding: {binding}")
+    if key is None:
+        raise ValueError(f"Hotkey binding has no key: {binding}")
+    return modifiers, key
+
+
+class HotkeyBackend:
+    def start(self, bindings, on_hotkey):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class Win32HotkeyBackend(HotkeyBackend):
+    # Registers OS-level hotkeys and blocks in GetMessage on its own thread, so nothing polls while idle
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+
+    def start(self, bindings, on_hotkey):
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(dict(bindings), on_hotkey), daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def _run(self, bindings, on_hotkey):
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+        # Hotkeys are owned by the thread that registers them
+        names = {}
+        for hotkey_id, (name, binding) in enumerate(bindings.items(), start=1):
+            modifiers, key = parse_binding(binding)
+            if user32.RegisterHotKey(None, hotkey_id, modifiers | MOD_NOREPEAT, key):
+                names[hotkey_id] = name
+            else:
+                logging.error(f"Could not register hotkey {binding} for {name}; it may be in use by another program.")
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY and msg.wParam in names:
+                    try:
+                        on_hotkey(names[msg.wParam])
+                    except Exception as e:
+                        # Leaving the loop would unregister every hotkey for the rest of the session
+                        logging.error(f"Hotkey {names[msg.wParam]} failed: {e}")
+        finally:
+            for hotkey_id in names:
+                user32.UnregisterHotKey(None, hotkey_id)
+
+    def stop(self):
+        if self._thread_id is not None:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(1.0)
+            self._thread_id = None
+
+
+class FakeHotkeyBackend(HotkeyBackend):
+    # Stand-in for platforms without global hotkeys; press() simulates the key combination
+    def __init__(self):
+        self.bindings = {}
+        self._on_hotkey = None
+
+    def start(self, bindings, on_hotkey):
+        self.bindings = dict(bindings)
+        self._on_hotkey = on_hotkey
+
+    def press(self, name):
+        if self._on_hotkey and name in self.bindings:
+            self._on_hotkey(name)
+
+    def stop(self):
+        self._on_hotkey = None
+
+
+def default_backend():
+    if sys.platform == 'win32':
+        return Win32HotkeyBackend()
+    return FakeHotkeyBackend()
+
+
+class HotkeyManager:
+    # Hands hotkey presses from the backend thread to handlers running on the Tk thread
+    def __init__(self, root, bindings=None, backend=None):
+        self.root = root
+        self.backend = backend or default_backend()
+        self.bindings = dict(DEFAULT_BINDINGS)
+        self.bindings.update(bindings or {})
+        self._handlers = {}
+        self._pending = queue.SimpleQueue()
+        self.root.bind('<<Hotkey>>', self._dispatch)
+
+    def register(self, name, handler):
+        self._handlers[name] = handler
+
+    def start(self):
+        # Only actions with a handler are registered, so each app claims just its own key combinations
+        active = {name: binding for name, binding in self.bindings.items() if name in self._handlers}
+        self.backend.start(valid_bindings(active), self._post)
+
+    def stop(self):
+        self.backend.stop()
+
+    def rebind(self, bindings):
+        self.stop()
+        self.bindings.update(valid_bindings(bindings))
+        self.start()
+
+    def _post(self, name):
+        self._pending.put(name)
+        try:
+            self.root.event_generate('<<Hotkey>>', when='tail')
+        except RuntimeError:
+            # Tk only takes events from other threads once mainloop runs; a press during login is dropped
+            # rather than fired late together with the next one
+            while True:
+                try:
+                    self._pending.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _dispatch(self, event):
+        while True:
+            try:
+                name = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            handler = self._handlers.get(name)
+            if handler:
+                handler()
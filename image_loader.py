@@ -0,0 +1,60 @@
+import numpy as np
+from PIL import Image
+
+# Channel order of the raw BMP layouts that can be read straight from a memory map
+_BMP_CHANNELS = {'BGR': 3, 'BGRX': 4, 'BGRA': 4}
+
+
+def clamp_box(box, size):
+    left, top, right, bottom = box
+    width, height = size
+    return (min(max(left, 0), width), min(max(top, 0), height),
+            min(max(right, 0), width), min(max(bottom, 0), height))
+
+
+def _bmp_regions(path, image, boxes):
+    # Uncompressed BMP pixels sit at a fixed offset, so only the rows inside each box are paged in
+    if image.format != 'BMP' or len(image.tile) != 1:
+        return None
+    codec, _, offset, args = image.tile[0]
+    if codec != 'raw' or not isinstance(args, tuple) or len(args) != 3 or args[0] not in _BMP_CHANNELS:
+        return None
+    rawmode, stride, direction = args
+    channels = _BMP_CHANNELS[rawmode]
+    width, height = image.size
+
+    pixels = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(height, stride))
+    regions = {}
+    for key, box in boxes.items():
+        left, top, right, bottom = clamp_box(box, image.size)
+        if direction == -1:
+            # Bottom-up file: image row y is stored at file row height - 1 - y
+            rows = pixels[height - bottom:height - top][::-1]
+        else:
+            rows = pixels[top:bottom]
+        block = rows[:, left * channels:right * channels].reshape(bottom - top, right - left, channels)
+        regions[key] = Image.fromarray(np.ascontiguousarray(block[..., 2::-1]))
+    del pixels
+    return regions
+
+
+def load_regions(path, boxes, scale=1.0):
+    """ Decode only what the given boxes need; returns {key: RGB image} with boxes in full-resolution pixels """
+    with Image.open(path) as image:
+        regions = _bmp_regions(path, image, boxes)
+        if regions is not None:
+            return regions
+
+        factor = 1.0
+        if scale < 1 and image.format == 'JPEG':
+            # Let libjpeg decode at a reduced DCT scale instead of decoding full size and shrinking
+            full_width, full_height = image.size
+            image.draft('RGB', (max(1, int(full_width * scale)), max(1, int(full_height * scale))))
+            factor = image.size[0] / full_width
+
+        regions = {}
+        for key, box in boxes.items():
+            scaled = tuple(int(round(coord * factor)) for coord in box)
+            # Crop first so colour conversion only ever touches the region's pixels
+            regions[key] = image.crop(clamp_box(scaled, image.size)).convert('RGB')
+        return regions
@@ -0,0 +1,20 @@
+import importlib
+import logging
+import sys
+import time
+
+# module name -> seconds spent on its first import
+import_timings = {}
+
+
+def load(name):
+    """ Import a heavy module on first use and record how long it took """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_timings[name] = time.perf_counter() - start
+    logging.info(f"Imported {name} in {import_timings[name] * 1000:.1f} ms")
+    return module
@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import html
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 47633
+LEADERBOARD_PATH = '/profile/leaderboards/quickplay'
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Leaderboards</title></head><body>
+<table class="table table-striped">
+<tr><th>Rank</th><th>Pilot</th><th>Wins</th><th>Losses</th><th>W/L</th><th>Kills</th><th>Deaths</th><th>K/D</th>
+<th>Games Played</th><th>Avg Match Score</th></tr>
+{rows}
+</table>
+</body></html>
+"""
+
+
+def synthetic_row(name):
+    # Stable per-name numbers, so repeated runs fetch identical pages
+    rng = random.Random(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest())
+    games = rng.randint(20, 6000)
+    wins = int(games * rng.uniform(0.35, 0.65))
+    losses = games - wins
+    deaths = max(1, int(games * rng.uniform(0.6, 0.95)))
+    kills = int(deaths * rng.uniform(0.4, 2.5))
+    cells = [rng.randint(1, 60000), html.escape(name), wins, losses, f"{wins / max(1, losses):.2f}", kills, deaths,
+             f"{kills / deaths:.2f}", games, rng.randint(120, 420)]
+    return "<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>"
+
+
+class TokenBucket:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'LeaderboardStandin/1.0'
+    standin = None  # set by LeaderboardStandin.start
+
+    def do_GET(self):
+        standin = self.standin
+        url = urlparse(self.path)
+        if url.path != LEADERBOARD_PATH:
+            return self.send_page(404, "Not found")
+        name = parse_qs(url.query).get('user', [''])[0]
+
+        if standin.bucket and not standin.bucket.take():
+            standin.count('rate_limited')
+            return self.send_page(429, "Too many requests", {'Retry-After': '1'})
+        delay = standin.latency + (standin.rng_uniform(-standin.jitter, standin.jitter) if standin.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if standin.rng_uniform(0, 1) < standin.error_rate:
+            standin.count('errors')
+            return self.send_page(500, "Internal server error")
+
+        page = standin.recorded_page(name)
+        if page is None:
+            found = standin.rng_uniform(0, 1) >= standin.not_found_rate
+            page = PAGE.format(rows=synthetic_row(name) if found else "")
+        standin.count('served')
+        self.send_page(200, page)
+
+    def send_page(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LeaderboardStandin:
+    # Local stand-in for the quickplay leaderboard page that parse_leaderboard reads; latency is in seconds
+    def __init__(self, host=DEFAULT_HOST, port=0, latency=0.05, jitter=0.02, error_rate=0.0, not_found_rate=0.0,
+                 rate_limit=None, recorded_dir=None, seed=0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.recorded_dir = recorded_dir
+        self.counters = {'served': 0, 'errors': 0, 'rate_limited': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url_template(self):
+        return f"http://{self.host}:{self.port}{LEADERBOARD_PATH}?type=0&user={{name}}"
+
+    def start(self):
+        handler = type('BoundStandinHandler', (StandinHandler,), {'standin': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        self._thread = threading.Thread(target=self._server.serve_forever, name='leaderboard-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def rng_uniform(self, low, high):
+        with self._lock:
+            return self._rng.uniform(low, high)
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def recorded_page(self, name):
+        # Saved real pages (<name>.html) take precedence over synthetic ones
+        if not self.recorded_dir:
+            return None
+        path = os.path.join(self.recorded_dir, f"{name}.html")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the MWO quickplay leaderboard.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=50, help="mean response delay in ms")
+    parser.add_argument('--jitter', type=float, default=20, help="uniform +/- delay spread in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help="fraction of players not on the board")
+    parser.add_argument('--rate-limit', type=float, default=None, help="requests per second before 429s")
+    parser.add_argument('--recorded', default=None, help="directory of saved <name>.html leaderboard pages")
+    args = parser.parse_args(argv)
+
+    standin = LeaderboardStandin(args.host, args.port, args.latency / 1000, args.jitter / 1000, args.error_rate,
+                                 args.not_found_rate, args.rate_limit, args.recorded).start()
+    print(f"Serving leaderboard stand-in at {standin.url_template}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
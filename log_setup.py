@@ -0,0 +1,117 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Attributes every LogRecord has; anything else was passed through `extra` and goes into the JSON record
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def default_log_dir():
+    log_dir = os.environ.get('MECHPUG_LOG_DIR')
+    if log_dir:
+        return log_dir
+    if os.name == 'nt':
+        return 'C:\\MechPUGCommander'
+    return os.path.abspath('.')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    # Lets everything at INFO and above through, but only one in `rate` DEBUG records per call site
+    def __init__(self, rate=100):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.rate == 0
+
+
+def configure_logging(log_dir=None, filename='image_parser.log', level=logging.INFO, debug_sample_rate=100,
+                      max_bytes=2 * 1024 * 1024, backup_count=3, console=True):
+    """ Route the root logger through a queue so callers never wait on log I/O """
+    global _listener
+    stop_logging()
+
+    log_dir = log_dir or default_log_dir()
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+    except OSError:
+        log_dir = os.path.abspath('.')
+
+    file_handler = logging.handlers.RotatingFileHandler(os.path.join(log_dir, filename), maxBytes=max_bytes,
+                                                        backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def stop_logging():
+    # Flushes whatever is still queued and closes the sinks
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+@contextmanager
+def log_stage(stage, level=logging.INFO, **fields):
+    # Logs how long the wrapped block took as a structured record
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        logging.log(level, f"{stage} took {duration_ms:.1f} ms",
+                    extra={'stage': stage, 'duration_ms': round(duration_ms, 2), **fields})
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+import numpy as np
+
+from stats_table import COLUMN_INDEX
+
+# Relative weight of each stat in a player's threat score
+WEIGHTS = {'kd': 0.45, 'wl': 0.35, 'score': 0.2}
+# A typical quickplay average match score; scores are measured in hundreds from here
+BASELINE_SCORE = 250.0
+# Players with few games are pulled towards average: confidence is games / (games + PRIOR_GAMES)
+PRIOR_GAMES = 50
+# Logit per unit of summed threat difference; a hand-tuned heuristic, not fitted to match results
+WIN_SCALE = 0.35
+
+MatchAnalysis = namedtuple('MatchAnalysis', ['win_probability', 'threats', 'team_threat', 'enemy_threat',
+                                             'known', 'players'])
+
+
+def threat_scores(values):
+    """ One threat score per stats row; 0 is an average pilot, and missing stats count as average """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        kd = np.log(np.clip(values[:, COLUMN_INDEX['kd']], 0.05, 20))
+        wl = np.log(np.clip(values[:, COLUMN_INDEX['wl']], 0.05, 20))
+        score = (values[:, COLUMN_INDEX['score']] - BASELINE_SCORE) / 100
+    raw = (WEIGHTS['kd'] * np.nan_to_num(kd) + WEIGHTS['wl'] * np.nan_to_num(wl) +
+           WEIGHTS['score'] * np.nan_to_num(score))
+    games = np.nan_to_num(values[:, COLUMN_INDEX['games']])
+    return raw * games / (games + PRIOR_GAMES)
+
+
+def win_probability(team_threats, enemy_threats):
+    return float(1 / (1 + np.exp(-WIN_SCALE * (team_threats.sum() - enemy_threats.sum()))))
+
+
+class MatchAnalyzer:
+    # Joins the parsed rosters to a StatsTable; each analysis is a handful of vector ops over at most 24 rows
+    def __init__(self, table):
+        self.table = table
+        self.team = []
+        self.enemy = []
+        self.result = None
+
+    def set_rosters(self, team, enemy):
+        self.team, self.enemy = list(team), list(enemy)
+        return self.analyze()
+
+    def involves(self, names):
+        roster = set(self.team) | set(self.enemy)
+        return any(name in roster for name in names)
+
+    def analyze(self):
+        team_rows, enemy_rows = self.table.rows(self.team), self.table.rows(self.enemy)
+        rows = np.concatenate([team_rows, enemy_rows])
+        threats = threat_scores(self.table.values[rows])
+        team_threats, enemy_threats = threats[:len(team_rows)], threats[len(team_rows):]
+        known = int((~np.isnan(self.table.values[rows, COLUMN_INDEX['games']])).sum())
+        self.result = MatchAnalysis(
+            win_probability=win_probability(team_threats, enemy_threats),
+            threats={self.table.names[row]: float(threat) for row, threat in zip(rows, threats)},
+            team_threat=float(team_threats.sum()),
+            enemy_threat=float(enemy_threats.sum()),
+            known=known,
+            players=len(self.team) + len(self.enemy),
+        )
+        return self.result
+
+
+def format_prediction(analysis):
+    return (f"Win chance {analysis.win_probability:.0%}  "
+            f"(threat {analysis.team_threat:+.2f} vs {analysis.enemy_threat:+.2f}, "
+            f"stats for {analysis.known}/{analysis.players})")
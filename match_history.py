@@ -0,0 +1,137 @@
+import sqlite3
+import time
+
+# A parse within this many seconds of the last match that shares most of its players is the same match
+SAME_MATCH_WINDOW = 20 * 60
+SAME_MATCH_OVERLAP = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    player TEXT NOT NULL,
+    side TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_totals (
+    player TEXT PRIMARY KEY,
+    faced INTEGER NOT NULL DEFAULT 0,
+    teamed INTEGER NOT NULL DEFAULT 0,
+    wins_with INTEGER NOT NULL DEFAULT 0,
+    losses_with INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL
+);
+CREATE TABLE IF NOT EXISTS recorded_rosters (
+    stamp REAL PRIMARY KEY
+);
+CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players(player, match_id);
+CREATE INDEX IF NOT EXISTS idx_match_players_match ON match_players(match_id);
+CREATE INDEX IF NOT EXISTS idx_matches_played_at ON matches(played_at);
+"""
+
+SIDES = {'Your Team': 'team', 'Your Enemy': 'enemy'}
+
+
+class MatchHistory:
+    # Append-only roster log with per-player running totals, so lookups never scan history
+    def __init__(self, path='match_history.db'):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def latest_match(self):
+        row = self.conn.execute('SELECT id, played_at, result FROM matches ORDER BY id DESC LIMIT 1').fetchone()
+        if not row:
+            return None
+        players = self.conn.execute('SELECT player, side FROM match_players WHERE match_id = ?', (row[0],)).fetchall()
+        return row[0], row[1], row[2], set(players)
+
+    def record_match(self, match_players, played_at=None, roster_stamp=None):
+        """ Log freshly parsed sides; re-parses of the same lobby extend the existing match instead of adding one.
+
+        Only pass sides that were actually parsed: a side carried over from an earlier parse would make two
+        different matches look alike. A roster_stamp that was already recorded is ignored.
+        """
+        played_at = played_at or time.time()
+        by_side = {}
+        for team, names in match_players.items():
+            names = {name for name in names if name}
+            if names:
+                by_side[SIDES[team]] = names
+        if not by_side:
+            return None
+
+        with self.conn:
+            if roster_stamp is not None and not self.conn.execute(
+                    'INSERT OR IGNORE INTO recorded_rosters (stamp) VALUES (?)', (roster_stamp,)).rowcount:
+                return None
+            players = {(name, side) for side, names in by_side.items() for name in names}
+            latest = self.latest_match()
+            if (latest and latest[2] is None and played_at - latest[1] < SAME_MATCH_WINDOW
+                    and self._continues(latest[3], by_side)):
+                self._add_players(latest[0], players - latest[3], played_at)
+                return latest[0]
+
+            match_id = self.conn.execute('INSERT INTO matches (played_at) VALUES (?)', (played_at,)).lastrowid
+            self._add_players(match_id, players, played_at)
+            return match_id
+
+    @staticmethod
+    def _continues(previous_players, by_side):
+        # Decided per side: each parsed side must mostly match that side of the match, or fill a side it lacks
+        for side, names in by_side.items():
+            previous = {name for name, previous_side in previous_players if previous_side == side}
+            if previous and len(names & previous) / len(names) < SAME_MATCH_OVERLAP:
+                return False
+        return True
+
+    def _add_players(self, match_id, players, played_at):
+        self.conn.executemany('INSERT INTO match_players (match_id, player, side) VALUES (?, ?, ?)',
+                              [(match_id, name, side) for name, side in players])
+        self.conn.executemany(
+            'INSERT INTO player_totals (player, faced, teamed, last_seen) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(player) DO UPDATE SET faced = faced + excluded.faced, '
+            'teamed = teamed + excluded.teamed, last_seen = excluded.last_seen',
+            [(name, int(side == 'enemy'), int(side == 'team'), played_at) for name, side in players])
+
+    def set_result(self, match_id, won):
+        # The outcome is recorded once; teammates' win/loss totals move with it
+        with self.conn:
+            updated = self.conn.execute('UPDATE matches SET result = ? WHERE id = ? AND result IS NULL',
+                                        ('win' if won else 'loss', match_id)).rowcount
+            if not updated:
+                return False
+            column = 'wins_with' if won else 'losses_with'
+            self.conn.execute(
+                f'UPDATE player_totals SET {column} = {column} + 1 WHERE player IN '
+                '(SELECT player FROM match_players WHERE match_id = ? AND side = ?)', (match_id, 'team'))
+        return True
+
+    def player_summaries(self, names):
+        """ {name: (faced, teamed, wins_with, losses_with)} for the given names, one indexed lookup each """
+        names = list(names)
+        summaries = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for row in self.conn.execute(
+                    f'SELECT player, faced, teamed, wins_with, losses_with FROM player_totals '
+                    f'WHERE player IN ({placeholders})', chunk):
+                summaries[row[0]] = row[1:]
+        return summaries
+
+
+def format_summary(summary):
+    faced, teamed, wins, losses = summary
+    text = f"Faced {faced}x | With {teamed}x"
+    if wins + losses:
+        text += f" ({wins / (wins + losses):.0%} W)"
+    return text
@@ -0,0 +1,177 @@
+import logging
+from collections import namedtuple
+from PIL import Image, ImageEnhance, ImageFilter
+
+import lazy_modules
+from ocr_profiles import DEFAULT_PROFILE
+from row_cache import row_key
+
+# Tesseract page segmentation modes: a block of lines for panels, a single line for rows
+PANEL_PSM = 6
+ROW_PSM = 7
+# Lines below this mean word confidence (0-100) get the expensive fallback pass
+LOW_CONFIDENCE = 75
+FALLBACK_SCALE = 2
+# Pixels of context kept around a line box when it is re-OCRed on its own
+LINE_PADDING = 4
+
+# box is (left, top, right, bottom) in the image that was recognized, or None
+OcrLine = namedtuple('OcrLine', ['text', 'confidence', 'box'])
+
+
+def enhance_image(image):
+    # OpenCV and NumPy are only loaded once pre-processing is first needed
+    cv2 = lazy_modules.load('cv2')
+    np = lazy_modules.load('numpy')
+
+    # Convert PIL Image to OpenCV format
+    cv_image = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+
+    # Convert to grayscale
+    gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+
+    # Apply slight Gaussian blur to reduce noise
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+
+    # Apply adaptive thresholding
+    thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+    # Invert the image (black text on white background)
+    inverted = cv2.bitwise_not(thresh)
+
+    # Apply slight dilation to make text more prominent
+    kernel = np.ones((2, 2), np.uint8)
+    dilated = cv2.dilate(inverted, kernel, iterations=1)
+
+    # Convert back to PIL Image
+    return Image.fromarray(cv2.cvtColor(dilated, cv2.COLOR_GRAY2RGB))
+
+
+def enhance_image_soft(image):
+    # The PUGCommander pipeline: keeps grey levels instead of thresholding, which rescues thin glyphs
+    gray_image = image.convert('L')
+
+    # Increase contrast
+    enhancer = ImageEnhance.Contrast(gray_image)
+    enhanced_image = enhancer.enhance(2.0)
+
+    # Increase sharpness
+    enhancer = ImageEnhance.Sharpness(enhanced_image)
+    enhanced_image = enhancer.enhance(2.0)
+
+    # Apply median filter to reduce noise
+    return enhanced_image.filter(ImageFilter.MedianFilter(size=3))
+
+
+def clean_line(line):
+    # Remove any non-printable characters and surrounding whitespace
+    return ''.join(char for char in line if char.isprintable()).strip()
+
+
+def clean_lines(text):
+    cleaned_lines = []
+    for line in text.split('\n'):
+        cleaned_line = clean_line(line)
+        if cleaned_line:
+            cleaned_lines.append(cleaned_line)
+    return cleaned_lines
+
+
+def ocr_lines(image, config):
+    """ Run Tesseract and group its word boxes into lines carrying a mean confidence """
+    pytesseract = lazy_modules.load('pytesseract')
+    data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+    grouped = {}
+    for i, word in enumerate(data['text']):
+        confidence = float(data['conf'][i])
+        word = clean_line(word)
+        if confidence < 0 or not word:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left, top = data['left'][i], data['top'][i]
+        grouped.setdefault(key, []).append((left, top, left + data['width'][i], top + data['height'][i],
+                                            word, confidence))
+
+    lines = []
+    for words in grouped.values():
+        words.sort()
+        text = ' '.join(word[4] for word in words)
+        # Weight by word length so a confident one-letter fragment cannot mask a garbled name
+        weight = sum(len(word[4]) for word in words)
+        confidence = sum(len(word[4]) * word[5] for word in words) / weight
+        box = (min(word[0] for word in words), min(word[1] for word in words),
+               max(word[2] for word in words), max(word[3] for word in words))
+        lines.append(OcrLine(text, confidence, box))
+    lines.sort(key=lambda line: line.box[1])
+    return lines
+
+
+def recognize_fallback(image, profile=DEFAULT_PROFILE):
+    # Upscaled, softly enhanced single-line pass for rows the fast path was unsure about
+    width, height = image.size
+    upscaled = image.resize((width * FALLBACK_SCALE, height * FALLBACK_SCALE), Image.LANCZOS)
+    lines = ocr_lines(enhance_image_soft(upscaled), profile.config(ROW_PSM))
+    return merge_lines(lines)
+
+
+def merge_lines(lines):
+    if not lines:
+        return OcrLine('', 0.0, None)
+    text = ' '.join(line.text for line in lines)
+    confidence = min(line.confidence for line in lines)
+    return OcrLine(text, confidence, lines[0].box)
+
+
+def recognize_line(image, preprocess, threshold=LOW_CONFIDENCE, profile=DEFAULT_PROFILE, glyphs=None, cache=None):
+    # One scoreboard row; the fallback only runs when the fast pass is below the threshold
+    prepared = enhance_image(image) if preprocess else image
+
+    # Rows seen before (same pilot, same binarized pixels) come straight from the cache
+    if cache is not None:
+        key = row_key(prepared, profile.config(ROW_PSM))
+        cached = cache.get(key)
+        if cached:
+            return OcrLine(cached[0], cached[1], None)
+
+    result = None
+    # The glyph atlas answers rows made entirely of known glyphs without calling Tesseract
+    if glyphs is not None:
+        match = glyphs.recognize(prepared)
+        if match:
+            result = OcrLine(match[0], match[1], None)
+
+    if result is None:
+        result = merge_lines(ocr_lines(prepared, profile.config(ROW_PSM)))
+        if result.confidence < threshold:
+            fallback = recognize_fallback(image, profile)
+            if fallback.confidence > result.confidence:
+                result = fallback
+        if glyphs is not None:
+            glyphs.learn(prepared, result.text, result.confidence)
+
+    # Only confident readings are worth repeating
+    if cache is not None and result.confidence >= threshold:
+        cache.put(key, result.text, result.confidence)
+    return result
+
+
+def recognize_panel(image, preprocess, threshold=LOW_CONFIDENCE, profile=DEFAULT_PROFILE):
+    """ OCR a whole panel, re-running only the low-confidence lines through the fallback """
+    prepared = enhance_image(image) if preprocess else image
+    lines = ocr_lines(prepared, profile.config(PANEL_PSM))
+
+    retried = 0
+    for index, line in enumerate(lines):
+        if line.confidence >= threshold:
+            continue
+        left, top, right, bottom = line.box
+        crop = image.crop((0, max(top - LINE_PADDING, 0), image.width, min(bottom + LINE_PADDING, image.height)))
+        fallback = recognize_fallback(crop, profile)
+        retried += 1
+        if fallback.text and fallback.confidence > line.confidence:
+            lines[index] = OcrLine(fallback.text, fallback.confidence, line.box)
+
+    logging.info(f"Panel OCR found {len(lines)} lines, {retried} re-run through the fallback.",
+                 extra={'lines': len(lines), 'retried': retried})
+    return prepared, lines
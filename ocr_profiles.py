@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import string
+
+# Characters MechWarrior Online allows in pilot names (spaces are inferred by Tesseract, not whitelisted)
+NAME_CHARSET = string.ascii_letters + string.digits + '_-.'
+USER_WORDS_FILE = 'player_names.user-words'
+
+
+class OcrProfile:
+    # Bundles the Tesseract options used for one kind of text
+    def __init__(self, name, whitelist=None, disable_dictionaries=False, user_words=None, oem=3,
+                 preserve_spaces=True):
+        self.name = name
+        self.whitelist = whitelist
+        self.disable_dictionaries = disable_dictionaries
+        self.user_words = user_words
+        self.oem = oem
+        self.preserve_spaces = preserve_spaces
+
+    def config(self, psm):
+        parts = [f'--oem {self.oem}', f'--psm {psm}']
+        if self.user_words:
+            parts.append(f'--user-words {self.user_words}')
+        if self.whitelist:
+            parts.append(f'-c tessedit_char_whitelist={self.whitelist}')
+        if self.disable_dictionaries:
+            # Names are not English words; skipping the dictionaries narrows and speeds up the search
+            parts.append('-c load_system_dawg=0 -c load_freq_dawg=0')
+        if self.preserve_spaces:
+            parts.append('-c preserve_interword_spaces=1')
+        return ' '.join(parts)
+
+
+DEFAULT_PROFILE = OcrProfile('default')
+PLAYER_NAMES_PROFILE = OcrProfile('player_names', whitelist=NAME_CHARSET, disable_dictionaries=True)
+PROFILES = {profile.name: profile for profile in (DEFAULT_PROFILE, PLAYER_NAMES_PROFILE)}
+
+
+def build_user_words(friends_path, words_path):
+    """ Write the words of every known pilot name to a Tesseract user-words file, if friends.json changed """
+    try:
+        friends_mtime = os.path.getmtime(friends_path)
+    except OSError:
+        return None
+    if os.path.exists(words_path) and os.path.getmtime(words_path) >= friends_mtime:
+        return words_path
+
+    with open(friends_path, 'r') as f:
+        friends = json.load(f)
+    words = sorted({word for name in friends for word in name.split() if word})
+    with open(words_path, 'w', encoding='utf-8') as f:
+        f.write(''.join(word + '\n' for word in words))
+    return words_path
+
+
+def load_profile(settings):
+    base = PROFILES.get(settings.get('ocr_profile', 'player_names'), PLAYER_NAMES_PROFILE)
+    if base.name != 'player_names' or not settings.get('ocr_user_words', True):
+        return base
+
+    words_path = os.path.join(settings.get('file_path', '.'), USER_WORDS_FILE)
+    if ' ' in words_path:
+        # pytesseract splits the config string on spaces, so the path cannot contain any
+        logging.warning(f"Skipping OCR user words: {words_path} contains spaces.")
+        return base
+    try:
+        user_words = build_user_words(settings.get('friends_path', 'friends.json'), words_path)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not build OCR user words: {e}")
+        return base
+    return OcrProfile(base.name, base.whitelist, base.disable_dictionaries, user_words, base.oem,
+                      base.preserve_spaces)
@@ -0,0 +1,217 @@
+import argparse
+import concurrent.futures
+import io
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from PIL import Image
+
+from batch_parse import init_worker, ocr_array
+from image_loader import clamp_box
+from log_setup import configure_logging
+from settings_store import read_settings
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 47632
+# Uploads larger than this are refused before being read
+MAX_BODY = 32 * 1024 * 1024
+RAW_MODES = {'RGB': 3, 'RGBA': 4, 'L': 1}
+
+
+def has_area(box):
+    left, top, right, bottom = box
+    return right > left and bottom > top
+
+
+def warm_up():
+    # Submitted once per worker so the first real request doesn't pay for process start and imports
+    return os.getpid()
+
+
+class ParseService:
+    # Warm process pool shared by all requests; at most `workers + queue_size` parses are accepted at once
+    def __init__(self, settings, workers=None, queue_size=None):
+        self.settings = settings
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + (self.workers * 2 if queue_size is None else queue_size)
+        self.regions = {}
+        for side in ('team', 'enemy'):
+            # read_settings fills unselected areas with [0, 0, 0, 0]; a box without area is unconfigured
+            box = settings.get(f'{side}_coords')
+            if box and has_area(box):
+                self.regions[side] = tuple(box)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def start(self):
+        self._pool = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                                            initargs=(self.settings,))
+        pids = {future.result() for future in [self._pool.submit(warm_up) for _ in range(self.workers)]}
+        logging.info(f"Parse service ready with {len(pids)} warm OCR worker(s), capacity {self.capacity}.")
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def active(self):
+        with self._lock:
+            return self._active
+
+    def try_acquire(self):
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self._active += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def crops(self, image, region):
+        # A whole-screen upload is cut to the configured panels; 'full' treats the upload as one panel
+        if region == 'full' or not self.regions:
+            return {'full': image}
+        sides = list(self.regions) if region == 'both' else [region]
+        if any(side not in self.regions for side in sides):
+            raise ValueError(f"Unknown or unconfigured region '{region}'.")
+        boxes = {side: clamp_box(self.regions[side], image.size) for side in sides}
+        for side, box in boxes.items():
+            if not has_area(box):
+                raise ValueError(f"Region '{side}' lies outside the {image.size[0]}x{image.size[1]} upload.")
+        return {side: image.crop(box) for side, box in boxes.items()}
+
+    def parse(self, image, region='both'):
+        timings = {}
+        start = time.perf_counter()
+        futures = {side: self._pool.submit(ocr_array, np.asarray(crop.convert('RGB')))
+                   for side, crop in self.crops(image, region).items()}
+        timings['crop_ms'] = round((time.perf_counter() - start) * 1000, 1)
+
+        result = {}
+        for side, future in futures.items():
+            names, confidences = future.result()
+            result[side] = names
+            result.setdefault('confidences', {})[side] = confidences
+        timings['ocr_ms'] = round((time.perf_counter() - start) * 1000 - timings['crop_ms'], 1)
+        return result, timings
+
+
+def decode_body(body, query):
+    # Raw pixel buffers say their geometry in the query string; anything else is an encoded image file
+    if 'width' not in query:
+        image = Image.open(io.BytesIO(body))
+        image.load()
+        return image
+    width, height = int(query['width'][0]), int(query['height'][0])
+    mode = query.get('mode', ['RGB'])[0].upper()
+    if mode not in RAW_MODES:
+        raise ValueError(f"Unsupported pixel mode '{mode}'.")
+    if len(body) != width * height * RAW_MODES[mode]:
+        raise ValueError(f"Expected {width * height * RAW_MODES[mode]} bytes for {width}x{height} {mode}, "
+                         f"got {len(body)}.")
+    return Image.frombuffer(mode, (width, height), body, 'raw', mode, 0, 1)
+
+
+class ParseRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'MechPUGParse/1.0'
+    service = None  # set by make_server
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            return self.send_json(404, {'error': 'Not found.'})
+        self.send_json(200, {'status': 'ok', 'workers': self.service.workers,
+                             'capacity': self.service.capacity, 'active': self.service.active()})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/parse':
+            return self.send_json(404, {'error': 'Not found.'})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            return self.send_json(411, {'error': 'A request body with Content-Length is required.'})
+        if length > MAX_BODY:
+            return self.send_json(413, {'error': f'Body larger than {MAX_BODY} bytes.'})
+
+        # Refuse early when the pool is saturated instead of letting requests pile up behind it
+        if not self.service.try_acquire():
+            self.rfile.read(length)
+            return self.send_json(503, {'error': 'Parser busy, retry shortly.'}, {'Retry-After': '1'})
+        try:
+            start = time.perf_counter()
+            query = parse_qs(url.query)
+            body = self.rfile.read(length)
+            try:
+                image = decode_body(body, query)
+                decoded = time.perf_counter()
+                result, timings = self.service.parse(image, query.get('region', ['both'])[0])
+            except (OSError, ValueError) as e:
+                return self.send_json(400, {'error': str(e)})
+            except Exception as e:
+                logging.error(f"Parse request failed: {e}")
+                return self.send_json(500, {'error': str(e)})
+            timings['decode_ms'] = round((decoded - start) * 1000, 1)
+            timings['total_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            result['timings'] = timings
+            self.send_json(200, result)
+        finally:
+            self.service.release()
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type('BoundParseRequestHandler', (ParseRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the roster parser over local HTTP/JSON.")
+    parser.add_argument('--settings', default='settings.json')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--queue', type=int, default=None, help="requests allowed to wait for a worker")
+    args = parser.parse_args(argv)
+
+    configure_logging(filename='parse_server.log')
+    settings = read_settings(args.settings)
+
+    service = ParseService(settings, args.workers, args.queue)
+    service.start()
+    server = make_server(service, args.host, args.port)
+    logging.info(f"Listening on http://{args.host}:{server.server_port}/parse")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import tkinter as tk
+import weakref
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+from assets import track
+
+PREVIEW_WIDTH = 300
+
+
+def scale_preview(image, width=PREVIEW_WIDTH):
+    src_width, src_height = image.size
+    height = max(1, int(src_height * (width / src_width)))
+
+    # Integer box reduction does the bulk of the shrinking, bilinear only covers the remainder
+    factor = src_width // width
+    if factor >= 2:
+        image = image.reduce(factor)
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.BILINEAR)
+    return image
+
+
+class PreviewCache:
+    # Previews keyed on the source image's id; the weak reference guards against id reuse
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, image, width=PREVIEW_WIDTH):
+        key = (id(image), width)
+        entry = self._entries.get(key)
+        if entry and entry[0]() is image:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        # Previews of images that no longer exist can never be hit again
+        for stale in [stale for stale, (ref, _) in self._entries.items() if ref() is None]:
+            del self._entries[stale]
+        preview = track(scale_preview(image, width), 'preview')
+        self._entries[key] = (weakref.ref(image), preview)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return preview
+
+
+class PreviewPanel:
+    def __init__(self, parent, row, bg='#1e1e1e', fg='#a0a0a0'):
+        self.row = row
+        self.photo = None
+        self.image_label = tk.Label(parent, bg=bg)
+        self.names_label = tk.Label(parent, bg=bg, fg=fg, justify=tk.LEFT)
+        self.visible = False
+
+    def show(self, preview, names):
+        # Returns True when the panel's footprint changed and the window layout needs recalculating
+        layout_changed = not self.visible
+        if self.photo and (self.photo.width(), self.photo.height()) == preview.size:
+            self.photo.paste(preview)
+        else:
+            self.photo = track(ImageTk.PhotoImage(preview), 'preview')
+            self.image_label.configure(image=self.photo)
+            layout_changed = True
+
+        names_text = "\n".join(names)
+        if self.names_label.cget('text').count('\n') != names_text.count('\n'):
+            layout_changed = True
+        self.names_label.configure(text=names_text)
+
+        if not self.visible:
+            self.image_label.grid(row=self.row, column=0, padx=(10, 5), pady=10, sticky="nw")
+            self.names_label.grid(row=self.row, column=1, padx=(5, 10), pady=10, sticky="nw")
+            self.visible = True
+        return layout_changed
+
+    def hide(self):
+        if self.visible:
+            self.image_label.grid_remove()
+            self.names_label.grid_remove()
+            self.visible = False
+            return True
+        return False
+
+
+class PreviewRenderer:
+    # Reuses one label pair and PhotoImage per panel instead of rebuilding widgets on every result
+    def __init__(self, parent, width=PREVIEW_WIDTH):
+        self.parent = parent
+        self.width = width
+        self.cache = PreviewCache()
+        self.panels = []
+
+    def show(self, panels):
+        layout_changed = False
+        for index, (image, names) in enumerate(panels):
+            if index == len(self.panels):
+                self.panels.append(PreviewPanel(self.parent, index))
+            preview = self.cache.get(image, self.width)
+            layout_changed |= self.panels[index].show(preview, names)
+        for panel in self.panels[len(panels):]:
+            layout_changed |= panel.hide()
+        return layout_changed
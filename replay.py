@@ -0,0 +1,151 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+import lazy_modules
+from batch_parse import tesseract_command
+from capture_pipeline import CapturePipeline
+from capture_source import ReplayCapture, load_session
+from hotkeys import DEFAULT_BINDINGS, FakeHotkeyBackend
+from settings_store import read_settings
+
+TRIGGERS = ('hotkey', 'button')
+
+
+class ReplayDriver:
+    # Re-fires a session's triggers on its original timeline divided by `speed` (0 means as fast as possible).
+    # Hotkeys go through the hotkey backend exactly like live presses; button presses call on_button directly.
+    def __init__(self, events, backend, on_button, speed=1.0):
+        self.triggers = [event for event in events if event['type'] in TRIGGERS]
+        self.backend = backend
+        self.on_button = on_button
+        self.speed = speed
+
+    def run(self):
+        start = time.perf_counter()
+        for event in self.triggers:
+            if self.speed > 0:
+                delay = start + event['t'] / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            if event['type'] == 'hotkey':
+                self.backend.press(event['name'])
+            else:
+                self.on_button(event['name'])
+        return time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def recorded_regions(events):
+    # The panels as they were when recording: the team panel is always grabbed first, then the enemy panel
+    regions = []
+    for event in events:
+        if event['type'] == 'frame' and event['bbox'] and event['bbox'] not in regions:
+            regions.append(event['bbox'])
+            if len(regions) == 2:
+                return regions
+    raise ValueError("Session holds no recorded team and enemy panel frames")
+
+
+def benchmark(session_dir, settings, speed=1.0, preprocess=True, on_result=None):
+    """ Replay a recorded session through the capture pipeline; returns throughput and trigger-to-roster latency """
+    events = load_session(session_dir)
+    # Regions come from the session, not settings.json: the areas may have been reselected since recording
+    settings = dict(settings)
+    settings['team_coords'], settings['enemy_coords'] = recorded_regions(events)
+    pipeline = CapturePipeline(settings, ReplayCapture(session_dir, events))
+
+    # One consumer thread stands in for the Tk main loop that handles hotkeys in the app
+    triggered = queue.SimpleQueue()
+    latencies = []
+    errors = []
+
+    def on_trigger(name):
+        triggered.put((name, time.perf_counter()))
+
+    def consume():
+        while True:
+            item = triggered.get()
+            if item is None:
+                return
+            name, pressed = item
+            try:
+                _, _, rosters, confidences = pipeline.capture(preprocess, save_crops=False)
+            except Exception as e:
+                # A failed capture is reported with the results instead of silently ending the replay
+                errors.append(f"{name}: {e!r}")
+                continue
+            latencies.append(time.perf_counter() - pressed)
+            if on_result:
+                on_result({'trigger': name, 'rosters': rosters, 'confidences': confidences,
+                           'latency_ms': round(latencies[-1] * 1000, 1)})
+
+    backend = FakeHotkeyBackend()
+    names = {event['name'] for event in events if event['type'] == 'hotkey'}
+    backend.start({name: DEFAULT_BINDINGS.get(name, name) for name in names}, on_trigger)
+    consumer = threading.Thread(target=consume, name='replay-pipeline', daemon=True)
+    consumer.start()
+
+    start = time.perf_counter()
+    ReplayDriver(events, backend, on_trigger, speed).run()
+    triggered.put(None)
+    consumer.join()
+    elapsed = time.perf_counter() - start
+    backend.stop()
+
+    return {
+        'captures': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'captures_per_second': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            'p95': round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+            'max': round(max(latencies) * 1000, 1) if latencies else None,
+        },
+        'row_cache': {'hits': pipeline.row_cache.hits, 'misses': pipeline.row_cache.misses},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded capture session and benchmark the pipeline.")
+    parser.add_argument('session', help="directory written by a session recorder (settings 'record_dir')")
+    parser.add_argument('--settings', default='settings.json')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="timeline speed factor; 0 replays as fast as the pipeline allows")
+    parser.add_argument('--no-preprocess', action='store_true')
+    parser.add_argument('--out', default=None, help="JSON lines file for every replayed roster")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = read_settings(args.settings)
+    # A replay must not leave its readings in the live app's row cache
+    settings['row_cache_persist'] = False
+    command = tesseract_command(settings)
+    if command and os.path.exists(command):
+        lazy_modules.load('pytesseract').pytesseract.tesseract_cmd = command
+
+    out = open(args.out, 'w', encoding='utf-8') if args.out else None
+    try:
+        report = benchmark(args.session, settings, args.speed, not args.no_preprocess,
+                           (lambda result: out.write(json.dumps(result, ensure_ascii=False) + '\n')) if out else None)
+    finally:
+        if out:
+            out.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
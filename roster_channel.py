@@ -0,0 +1,141 @@
+import json
+import logging
+import queue
+import socket
+import threading
+
+from roster_output import empty_roster, merge_roster
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 47631
+
+
+class RosterPublisher:
+    # Pushes every parsed roster to local subscribers as one JSON object per line
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.roster = empty_roster()
+        self._latest = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._outbox = queue.SimpleQueue()
+        self._server = None
+
+    def start(self):
+        try:
+            self._server = socket.create_server((self.host, self.port))
+        except OSError as e:
+            # Another parser instance may own the port; the roster files still work as a fallback
+            logging.warning(f"Roster channel unavailable on {self.host}:{self.port}: {e}")
+            self._server = None
+            return False
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        logging.info(f"Publishing rosters on {self.host}:{self.port}")
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.close()
+            self._server = None
+        self._outbox.put(None)
+        with self._lock:
+            for conn in self._subscribers:
+                conn.close()
+            self._subscribers.clear()
+
+    def publish(self, rosters, confidences=None):
+        # Never blocks the caller; a background thread does the socket writes
+        with self._lock:
+            merge_roster(self.roster, rosters, confidences)
+            self._latest = json.dumps(self.roster, ensure_ascii=False)
+        self._outbox.put(self._latest)
+
+    def _accept_loop(self):
+        server = self._server
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            # New subscribers get the current roster straight away
+            with self._lock:
+                latest = self._latest
+            if latest is not None and not self._send(conn, latest):
+                continue
+            with self._lock:
+                self._subscribers.append(conn)
+
+    def _send_loop(self):
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for conn in subscribers:
+                if not self._send(conn, message):
+                    with self._lock:
+                        if conn in self._subscribers:
+                            self._subscribers.remove(conn)
+
+    def _send(self, conn, message):
+        try:
+            conn.sendall((message + '\n').encode('utf-8'))
+            return True
+        except OSError:
+            conn.close()
+            return False
+
+
+class RosterSubscription:
+    # Background reader that calls `callback(roster)` for every roster pushed by the publisher
+    def __init__(self, callback, host=DEFAULT_HOST, port=DEFAULT_PORT, reconnect_delay=2.0):
+        self.callback = callback
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self._closed = threading.Event()
+        self._sock = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed.set()
+        sock = self._sock
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                with socket.create_connection((self.host, self.port)) as sock:
+                    self._sock = sock
+                    with sock.makefile('r', encoding='utf-8') as stream:
+                        for line in stream:
+                            if line.strip():
+                                self._deliver(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            finally:
+                self._sock = None
+            # Publisher not running (yet); try again after a pause
+            self._closed.wait(self.reconnect_delay)
+
+    def _deliver(self, roster):
+        # A failing callback must not end the subscription for the rest of the session
+        try:
+            self.callback(roster)
+        except Exception as e:
+            logging.error(f"Roster subscriber callback failed: {e}")
+
+
+def subscribe(callback, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return RosterSubscription(callback, host, port).start()
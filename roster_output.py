@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import time
+
+ROSTER_FILES = {'Team': 'team.txt', 'Enemy': 'enemy.txt'}
+COMBINED_FILE = 'roster.json'
+# Windows refuses to replace a file another process has open; retry briefly before giving up
+REPLACE_ATTEMPTS = 5
+REPLACE_RETRY_DELAY = 0.05
+
+
+def atomic_write(path, data, encoding='utf-8'):
+    """ Write to a temp file next to `path` and swap it in, so readers never see a partial file """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        if os.name != 'nt':
+            # mkstemp creates owner-only files; other overlay tools need to read the output too
+            os.fchmod(fd, 0o644)
+        with open(fd, 'w', encoding=encoding) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(REPLACE_RETRY_DELAY)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def empty_roster():
+    return {'team': [], 'enemy': [], 'confidences': {'team': [], 'enemy': []}, 'timestamp': None,
+            'updated': {'team': None, 'enemy': None}}
+
+
+def read_roster(file_path):
+    try:
+        with open(os.path.join(file_path, COMBINED_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return empty_roster()
+
+
+def merge_roster(roster, rosters, confidences=None):
+    # Fold freshly parsed sides into a combined roster, keeping the other side as it was
+    # 'updated' records when each side was last parsed; sides equal to 'timestamp' came from this parse
+    now = time.time()
+    roster.setdefault('confidences', {})
+    roster.setdefault('updated', {})
+    for flag, names in rosters.items():
+        side = flag.lower()
+        roster[side] = list(names)
+        roster['confidences'][side] = list((confidences or {}).get(flag, []))
+        roster['updated'][side] = now
+    roster['timestamp'] = now
+    return roster
+
+
+def write_roster(file_path, rosters, confidences=None, combined=True):
+    # rosters maps 'Team'/'Enemy' to parsed names; sides not given keep their previous combined entry
+    for flag, names in rosters.items():
+        payload = ''.join(name + '\n' for name in names)
+        atomic_write(os.path.join(file_path, ROSTER_FILES[flag]), payload)
+
+    if not combined:
+        return None
+
+    roster = merge_roster(read_roster(file_path), rosters, confidences)
+    atomic_write(os.path.join(file_path, COMBINED_FILE), json.dumps(roster, ensure_ascii=False))
+    return roster
+
+
+class RosterWatcher:
+    # Lets consumers poll the combined roster cheaply: a stat per call, a read only when it changed
+    def __init__(self, file_path):
+        self.path = os.path.join(file_path, COMBINED_FILE)
+        self._signature = None
+
+    def poll(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from roster_output import atomic_write
+
+
+def row_key(prepared, profile_config):
+    # Binarized rows of the same name come out pixel-identical, so the exact bytes make a good key
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(profile_config.encode('utf-8'))
+    digest.update(f'{prepared.mode}{prepared.size}'.encode('ascii'))
+    digest.update(prepared.tobytes())
+    return digest.hexdigest()
+
+
+class RowCache:
+    # LRU of recognized rows keyed on the row's pixel hash, optionally persisted between sessions
+    def __init__(self, max_entries=2048, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, text, confidence):
+        with self._lock:
+            self._entries[key] = (text, confidence)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.dirty = True
+
+    def load(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable row cache {path}: {e}")
+            return
+        with self._lock:
+            for key, (text, confidence) in list(entries.items())[-self.max_entries:]:
+                self._entries[key] = (text, confidence)
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path or not self.dirty:
+            return
+        with self._lock:
+            payload = json.dumps({key: list(entry) for key, entry in self._entries.items()}, ensure_ascii=False)
+            self.dirty = False
+        atomic_write(path, payload)
@@ -0,0 +1,209 @@
+import copy
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from hotkeys import parse_binding
+from roster_output import atomic_write
+from stats_fetcher import LEADERBOARD_URL
+
+SETTINGS_FILE = 'settings.json'
+# Seconds of quiet before pending changes are written; bursts of edits become one write
+DEBOUNCE = 0.5
+
+
+def _coords(value):
+    return isinstance(value, list) and len(value) == 4 and all(isinstance(v, int) for v in value)
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _bindings(value):
+    if not isinstance(value, dict):
+        return False
+    try:
+        for binding in value.values():
+            parse_binding(binding)
+    except (AttributeError, ValueError):
+        return False
+    return True
+
+
+# key -> (validator, default); keys not listed here are kept as they are
+SCHEMA = {
+    # Shared by both apps
+    'tesseract_path': (lambda v: isinstance(v, str), 'C:\\Program Files\\Tesseract-OCR'),
+    'file_path': (lambda v: isinstance(v, str), 'C:\\MechPUGCommander'),
+    'roster_port': (_integer, 47631),
+    # ImageParserApp
+    'team_coords': (_coords, [0, 0, 0, 0]),
+    'enemy_coords': (_coords, [0, 0, 0, 0]),
+    'preprocess': (lambda v: isinstance(v, bool), True),
+    'rows_per_team': (_integer, 12),
+    'selector_downscale': (_number, 1),
+    'combined_output': (lambda v: isinstance(v, bool), True),
+    'ocr_confidence_threshold': (_number, 75),
+    'ocr_profile': (lambda v: isinstance(v, str), 'player_names'),
+    'ocr_user_words': (lambda v: isinstance(v, bool), True),
+    'friends_path': (lambda v: isinstance(v, str), 'friends.json'),
+    'glyph_fast_path': (lambda v: isinstance(v, bool), False),
+    'consensus_frames': (_integer, 1),
+    'row_cache_size': (_integer, 2048),
+    'row_cache_persist': (lambda v: isinstance(v, bool), True),
+    'deskew_imports': (lambda v: isinstance(v, bool), True),
+    'parser_hotkeys': (_bindings, {}),
+    # Directory to record capture sessions into for replay.py; empty disables recording
+    'record_dir': (lambda v: isinstance(v, str), ''),
+    # PUGCommander
+    'username': (lambda v: isinstance(v, str), ''),
+    'hotkeys': (_bindings, {}),
+    # Stats page per pilot; {name} is replaced with the pilot name
+    'leaderboard_url': (lambda v: isinstance(v, str) and '{name}' in v, LEADERBOARD_URL),
+}
+
+
+def validate(settings):
+    """ Defaults filled in and invalid values replaced, so callers can rely on types """
+    if not isinstance(settings, dict):
+        logging.warning("Settings file does not hold an object; using defaults.")
+        settings = {}
+    validated = dict(settings)
+    for key, (is_valid, default) in SCHEMA.items():
+        if key not in settings:
+            validated[key] = copy.deepcopy(default)
+        elif not is_valid(settings[key]):
+            logging.warning(f"Invalid setting {key}={settings[key]!r}; using {default!r}.")
+            validated[key] = copy.deepcopy(default)
+    return validated
+
+
+def read_settings(path=SETTINGS_FILE):
+    # One-off validated read for command-line tools that don't keep a store around
+    return validate(_read(path))
+
+
+def _read(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logging.error(f"Could not parse {path}: {e}")
+        return {}
+
+
+@contextmanager
+def file_lock(path):
+    # Exclusive lock on `path`.lock shared by every process using the file; blocks until it is free
+    with open(f'{path}.lock', 'a+') as lock_file:
+        lock_file.seek(0)
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            if os.name == 'nt':
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class SettingsStore:
+    # The in-memory copy is `data`; change it in place and call save(). Only keys this process changed are
+    # written, merged over what is on disk, so the two apps never clobber each other's settings.
+    def __init__(self, path=SETTINGS_FILE, debounce=DEBOUNCE):
+        self.path = path
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._timer = None
+        self._signature = self._stat()
+        self.data = validate(_read(path))
+        # Last values known to be on disk; anything in data that differs from this is a local change
+        self._persisted = copy.deepcopy(self.data)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def save(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            changes = self._local_changes()
+            if not changes:
+                return
+            # Both apps flush into the same file; the read-merge-write must not interleave with the other's
+            with file_lock(self.path):
+                on_disk = _read(self.path)
+                on_disk.update(copy.deepcopy(changes))
+                atomic_write(self.path, json.dumps(on_disk, indent=2))
+                self._signature = self._stat()
+            self._persisted.update(copy.deepcopy(changes))
+            logging.debug(f"Saved settings {sorted(changes)} to {self.path}")
+
+    def poll(self):
+        """ Reload after an external write; returns the keys whose in-memory value changed """
+        with self._lock:
+            signature = self._stat()
+            if signature == self._signature:
+                return set()
+            self._signature = signature
+            fresh = validate(_read(self.path))
+            local = self._local_changes()
+            changed = set()
+            for key, value in fresh.items():
+                # Unsaved local edits win over the file until they are flushed
+                if key not in local and self.data.get(key) != value:
+                    self.data[key] = value
+                    changed.add(key)
+            self._persisted = copy.deepcopy(fresh)
+            return changed
+
+    def close(self):
+        self.flush()
+
+    def _local_changes(self):
+        return {key: value for key, value in self.data.items()
+                if key not in self._persisted or self._persisted[key] != value}
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=SETTINGS_FILE):
+    # One store per file per process, so every window shares the same in-memory settings
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SettingsStore(path)
+        return _stores[path]
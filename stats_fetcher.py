@@ -0,0 +1,122 @@
+import itertools
+import logging
+import queue
+import threading
+
+from log_setup import log_stage
+
+LEADERBOARD_URL = "https://mwomercs.com/profile/leaderboards/quickplay?type=0&user={name}"
+
+# Lower numbers are fetched first
+PRIORITY_MATCH = 0
+PRIORITY_REFRESH = 10
+
+
+def parse_leaderboard(html, name):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='table table-striped')
+    if table:
+        rows = table.find_all('tr')
+        for row in rows[1:]:  # Skip header row
+            columns = row.find_all('td')
+            if columns and columns[1].text.strip() == name:
+                rank = columns[0].text.strip()
+                total_wins = columns[2].text.strip()
+                total_losses = columns[3].text.strip()
+                wl_ratio = columns[4].text.strip()
+                total_kills = columns[5].text.strip()
+                total_deaths = columns[6].text.strip()
+                kd_ratio = columns[7].text.strip()
+                games_played = columns[8].text.strip()
+                avg_match_score = columns[9].text.strip()
+                return (f"Rank: {rank}, W: {total_wins}, L: {total_losses}, W/L: {wl_ratio}, "
+                        f"K: {total_kills}, D: {total_deaths}, K/D: {kd_ratio}, "
+                        f"Games: {games_played}, Avg Score: {avg_match_score}")
+    return None
+
+
+def fetch_player_stats(session, name, url_template=LEADERBOARD_URL):
+    import requests
+    url = url_template.format(name=name)
+    logging.debug(f"Fetching stats for {name} from URL: {url}")
+    try:
+        with log_stage('fetch_stats', level=logging.DEBUG, player=name):
+            response = session.get(url)
+        logging.debug(f"Response from URL: {response.text[:200]}...")
+        response.raise_for_status()
+        return parse_leaderboard(response.text, name) or "NOT FOUND"
+    except requests.RequestException as e:
+        logging.error(f"Error fetching stats for {name}: {e}")
+        return "ERROR"
+
+
+class StatsFetcher:
+    # Priority queue of player names fetched by a fixed pool of threads, deduplicated against queued and
+    # in-flight requests; `on_result(name, stats)` is called from the worker threads
+    def __init__(self, fetch, on_result, workers=10):
+        self.fetch = fetch
+        self.on_result = on_result
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = {}  # name -> best priority currently queued
+        self._in_flight = set()
+        self._threads = []
+
+    def request(self, names, priority=PRIORITY_REFRESH):
+        self._start()
+        added = 0
+        with self._lock:
+            for name in names:
+                if name in self._in_flight:
+                    continue
+                current = self._queued.get(name)
+                if current is not None and current <= priority:
+                    continue
+                # A more urgent request re-queues the name; the older entry is skipped when it comes up
+                self._queued[name] = priority
+                self._queue.put((priority, next(self._order), name))
+                added += 1
+        return added
+
+    def pending(self):
+        with self._lock:
+            return len(self._queued) + len(self._in_flight)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put((float('-inf'), next(self._order), None))
+        self._threads = []
+
+    def _start(self):
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'stats-fetcher-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            priority, _, name = self._queue.get()
+            if name is None:
+                return
+            with self._lock:
+                if self._queued.get(name) != priority:
+                    continue
+                del self._queued[name]
+                self._in_flight.add(name)
+            try:
+                stats = self.fetch(name) or "NOT FOUND"
+            except Exception as exc:
+                logging.error(f"{name} generated an exception: {exc}")
+                stats = "ERROR"
+            with self._lock:
+                self._in_flight.discard(name)
+            try:
+                self.on_result(name, stats)
+            except Exception as exc:
+                # A failing callback must not cost the pool a worker
+                logging.error(f"Handling stats for {name} failed: {exc}")
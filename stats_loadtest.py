@@ -0,0 +1,158 @@
+import argparse
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+
+from friend_list import friend_list_text
+from leaderboard_standin import LeaderboardStandin
+from match_history import MatchHistory
+from stats_fetcher import PRIORITY_REFRESH, StatsFetcher, fetch_player_stats
+from stats_table import StatsTable
+
+# How often the simulated Tk loop wakes up to drain fetched stats, and the overlay's redraw coalescing
+TICK = 0.01
+REDRAW_INTERVAL = 0.2
+# Friends placed in the parsed match, per side, so redraws include the history and ordering of match players
+MATCH_SIZE = 12
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _ms(value):
+    return round(value * 1000, 1) if value is not None else None
+
+
+def run_load_test(url_template, friend_count, workers=10, timeout=600):
+    """ One 'Refresh Stats' over friend_count friends, the way OverlayWindow does it; returns the measurements.
+
+    The main thread plays the Tk thread: it queues the refresh, drains results into the friends dict and stats
+    table, and on each coalesced redraw does what populate_friend_list does short of the widget: sync the
+    table, look up match history and build the list text. Every slice of that work is timed; inserting the
+    text into the ScrolledText is not included.
+    """
+    import requests
+
+    friends = {f"Pilot{index:05d}": "" for index in range(friend_count)}
+    table = StatsTable()
+    table.sync(friends)
+    names = list(friends)
+    match_players = {"Your Team": names[:MATCH_SIZE], "Your Enemy": names[MATCH_SIZE:2 * MATCH_SIZE]}
+    history = MatchHistory(':memory:')
+    history.record_match(match_players)
+
+    def redraw():
+        table.sync(friends)
+        summaries = history.player_summaries(match_players["Your Team"] + match_players["Your Enemy"])
+        return friend_list_text(friends, table, match_players, 'rank', summaries=summaries)
+
+    session = requests.Session()
+    # One pooled connection per worker thread, as a browser-like keep-alive client would use
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def fetch(name):
+        start = time.perf_counter()
+        stats = fetch_player_stats(session, name, url_template)
+        with latencies_lock:
+            latencies.append(time.perf_counter() - start)
+        return stats
+
+    results = queue.SimpleQueue()
+    fetcher = StatsFetcher(fetch, lambda name, stats: results.put((name, stats)), workers)
+
+    blocking = []
+    redraws = []
+    start = time.perf_counter()
+    slice_start = time.perf_counter()
+    fetcher.request(list(friends), PRIORITY_REFRESH)
+    blocking.append(time.perf_counter() - slice_start)
+
+    received = 0
+    outcomes = Counter()
+    next_redraw = None
+    deadline = start + timeout
+    while received < friend_count and time.perf_counter() < deadline:
+        time.sleep(TICK)
+        slice_start = time.perf_counter()
+        while True:
+            try:
+                name, stats = results.get_nowait()
+            except queue.Empty:
+                break
+            friends[name] = stats
+            table.update(name, stats)
+            received += 1
+            outcomes[stats if stats in ("ERROR", "NOT FOUND") else "OK"] += 1
+            if next_redraw is None:
+                next_redraw = slice_start + REDRAW_INTERVAL
+        if next_redraw is not None and slice_start >= next_redraw:
+            redraw_start = time.perf_counter()
+            redraw()
+            redraws.append(time.perf_counter() - redraw_start)
+            next_redraw = None
+        blocking.append(time.perf_counter() - slice_start)
+    elapsed = time.perf_counter() - start
+    fetcher.stop()
+    session.close()
+    history.close()
+
+    return {
+        'friends': friend_count,
+        'completed': received,
+        'seconds': round(elapsed, 3),
+        'fetches_per_second': round(received / elapsed, 1) if elapsed else None,
+        'outcomes': dict(outcomes),
+        'fetch_latency_ms': {'p50': _ms(percentile(latencies, 0.5)), 'p95': _ms(percentile(latencies, 0.95)),
+                             'p99': _ms(percentile(latencies, 0.99)), 'max': _ms(max(latencies, default=None))},
+        'ui_blocking_ms': {'total': _ms(sum(blocking)), 'max': _ms(max(blocking)),
+                           'p99': _ms(percentile(blocking, 0.99))},
+        'redraw_ms': {'count': len(redraws), 'p50': _ms(percentile(redraws, 0.5)),
+                      'max': _ms(max(redraws, default=None))},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the stats refresh against a local leaderboard stand-in.")
+    parser.add_argument('--friends', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--url', default=None, help="URL template of an already running stand-in")
+    parser.add_argument('--latency', type=float, default=50, help="stand-in mean delay in ms")
+    parser.add_argument('--jitter', type=float, default=20, help="stand-in delay spread in ms")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--not-found-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=None, help="stand-in requests per second")
+    parser.add_argument('--timeout', type=float, default=600, help="give up on a run after this many seconds")
+    args = parser.parse_args(argv)
+
+    # Failed fetches are counted in the report; one log line each would swamp the output
+    logging.basicConfig(level=logging.CRITICAL)
+
+    standin = None
+    url_template = args.url
+    if url_template is None:
+        standin = LeaderboardStandin(latency=args.latency / 1000, jitter=args.jitter / 1000,
+                                     error_rate=args.error_rate, not_found_rate=args.not_found_rate,
+                                     rate_limit=args.rate_limit).start()
+        url_template = standin.url_template
+    try:
+        for count in args.friends:
+            report = run_load_test(url_template, count, args.workers, args.timeout)
+            json.dump(report, sys.stdout)
+            print(flush=True)
+    finally:
+        if standin:
+            standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import re
+
+import numpy as np
+
+# Column name -> label used in the stats strings built by stats_fetcher.parse_leaderboard
+COLUMNS = {
+    'rank': 'Rank',
+    'wins': 'W',
+    'losses': 'L',
+    'wl': 'W/L',
+    'kills': 'K',
+    'deaths': 'D',
+    'kd': 'K/D',
+    'games': 'Games',
+    'score': 'Avg Score',
+}
+COLUMN_INDEX = {column: index for index, column in enumerate(COLUMNS)}
+# Lower is better for rank; every other column sorts best-first descending
+ASCENDING = {'rank'}
+
+# Values may use thousands separators, which must not swallow the ', ' between fields
+_FIELD = re.compile(r'(?:^|, )(' + '|'.join(re.escape(label) for label in COLUMNS.values()) +
+                    r'): ((?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)')
+_LABEL_INDEX = {label: index for index, label in enumerate(COLUMNS.values())}
+
+
+def parse_stats(stats):
+    """ One row of floats from a stats string; fields that are missing (notes, NOT FOUND) stay NaN """
+    row = np.full(len(COLUMNS), np.nan)
+    for label, value in _FIELD.findall(stats or ''):
+        try:
+            row[_LABEL_INDEX[label]] = float(value.replace(',', ''))
+        except ValueError:
+            pass
+    return row
+
+
+class StatsTable:
+    # Player stats as one float64 array (a column per stat) so sorting and aggregates are vectorized
+    def __init__(self, capacity=256):
+        self.names = []
+        self.index = {}  # name -> row
+        self._sources = []  # raw stats string per row, so unchanged entries are never re-parsed
+        self._values = np.full((capacity, len(COLUMNS)), np.nan)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def values(self):
+        return self._values[:len(self.names)]
+
+    def update(self, name, stats):
+        row = self.index.get(name)
+        if row is not None:
+            if self._sources[row] != stats:
+                self._sources[row] = stats
+                self._values[row] = parse_stats(stats)
+            return
+        if len(self.names) == len(self._values):
+            grown = np.full((len(self._values) * 2, len(COLUMNS)), np.nan)
+            grown[:len(self._values)] = self._values
+            self._values = grown
+        row = len(self.names)
+        self.index[name] = row
+        self.names.append(name)
+        self._sources.append(stats)
+        self._values[row] = parse_stats(stats)
+
+    def remove(self, name):
+        # Move the last row into the gap so rows stay contiguous
+        row = self.index.pop(name)
+        last = len(self.names) - 1
+        if row != last:
+            moved = self.names[last]
+            self.names[row] = moved
+            self._sources[row] = self._sources[last]
+            self._values[row] = self._values[last]
+            self.index[moved] = row
+        self.names.pop()
+        self._sources.pop()
+        self._values[last] = np.nan
+
+    def sync(self, stats_by_name):
+        # Cheap when little changed: only new or edited strings are parsed
+        for name in [name for name in self.names if name not in stats_by_name]:
+            self.remove(name)
+        for name, stats in stats_by_name.items():
+            self.update(name, stats)
+
+    def rows(self, names=None):
+        if names is None:
+            return np.arange(len(self.names))
+        return np.array([self.index[name] for name in names if name in self.index], dtype=np.intp)
+
+    def column(self, column, names=None):
+        return self.values[self.rows(names), COLUMN_INDEX[column]]
+
+    def order(self, column, names=None, descending=None):
+        """ Names sorted best-first by `column` with a single argsort; players without the stat go last """
+        rows = self.rows(names)
+        keys = self.values[rows, COLUMN_INDEX[column]]
+        if descending is None:
+            descending = column not in ASCENDING
+        if descending:
+            keys = -keys
+        # argsort puts NaN last regardless of direction
+        ordered = rows[np.argsort(keys, kind='stable')]
+        return [self.names[row] for row in ordered]
+
+    def top(self, column, count, names=None):
+        return self.order(column, names)[:count]
+
+    def average(self, column, names=None):
+        values = self.column(column, names)
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+    def median(self, column, names=None):
+        values = self.column(column, names)
+        values = values[~np.isnan(values)]
+        return float(np.median(values)) if len(values) else None
+
+    def balance(self, team, enemy):
+        """ Side-by-side averages for two rosters plus how far apart their ranks are """
+        summary = {}
+        for side, names in (('team', team), ('enemy', enemy)):
+            summary[side] = {
+                'players': len(self.rows(names)),
+                'kd': self.average('kd', names),
+                'wl': self.average('wl', names),
+                'score': self.average('score', names),
+                'rank': self.median('rank', names),
+            }
+        team_rank, enemy_rank = summary['team']['rank'], summary['enemy']['rank']
+        # Positive means the enemy's median rank number is higher, i.e. the team is ranked better
+        summary['rank_spread'] = enemy_rank - team_rank if team_rank is not None and enemy_rank is not None else None
+        return summary
+
+
+def format_balance(summary):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else '-'
+
+    team, enemy = summary['team'], summary['enemy']
+    lines = [
+        "Match balance    Team  /  Enemy",
+        f"Avg K/D       {fmt(team['kd'], '6.2f')}  /  {fmt(enemy['kd'], '.2f')}",
+        f"Avg W/L       {fmt(team['wl'], '6.2f')}  /  {fmt(enemy['wl'], '.2f')}",
+        f"Avg Score     {fmt(team['score'], '6.0f')}  /  {fmt(enemy['score'], '.0f')}",
+        f"Median Rank   {fmt(team['rank'], '6.0f')}  /  {fmt(enemy['rank'], '.0f')}",
+    ]
+    if summary['rank_spread'] is not None:
+        lines.append(f"Rank spread   {summary['rank_spread']:+.0f}")
+    return "\n".join(lines)